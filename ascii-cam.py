@@ -12,21 +12,31 @@ Tanpa UI:
   python3 cam.py --menu
   atau langsung parameter CLI seperti biasa.
 """
+from __future__ import annotations
 import argparse, sys, time, signal, os, subprocess, shutil, threading
-import cv2, numpy as np, pyvirtualcam
-import json
+import json, re, functools, atexit
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from pathlib import Path
 
-# ==== optional UI
-try:
-    from flask import Flask, request, redirect, render_template_string, jsonify
-    FLASK_OK = True
-except Exception:
-    FLASK_OK = False
+_T_MODULE = time.perf_counter()
+
+# ==== heavy deps: di-import lazy oleh load_deps() / load_flask()
+cv2 = np = pyvirtualcam = None
+Flask = request = redirect = render_template_string = jsonify = None
 
 ASCII_CHARS_DEFAULT = "@%#*+=-:. "  # dark -> light
 CONFIG_DIR  = Path.home() / ".config" / "ascii-cam"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+CONFIG_HISTORY_DIR = CONFIG_DIR / "history"
+CONFIG_HISTORY = 10      # versi config.json yang disimpan untuk rollback
+PRESET_DIR  = CONFIG_DIR / "presets"
+PRESET_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+RENDER_CACHE_SIZE = 8
+CAPTURE_FAIL_STREAK = 10   # read gagal berturut-turut sebelum reconnect
+LARGE_ALLOC_BYTES = 1 << 20  # alokasi >= 1 MiB dihitung "besar" di telemetry memori
+PALETTE_LUT_SIZE = 32       # resolusi LUT palet per kanal (32 -> 32x32x32)
+ROI_MOVE_CELLS = 1          # ROI geser <= ini (sel kasar) -> layout tidak di-rebuild
 
 DEFAULT_CONFIG = {
     "in_index": None,
@@ -39,8 +49,264 @@ DEFAULT_CONFIG = {
     "ascii_chars": "@%#*+=-:. ",
     "duo1": "#ffffff", "duo2": "#ffffff",
     "bg": "#000000",
+    "font": "simplex", "font_scale": 0.35,
+    "preset": None,
+    "motion_threshold": 1.0, "idle_after": 5.0, "idle_fps": 0,
+    "glyph_mode": "brightness", "shape_grid": 2,
+    "stall_timeout": 2.0, "backoff_max": 8.0,
+    "color_mode": "duotone", "palette": [],
+    "out_format": "bgr",
+    "roi_mode": "off", "roi": [0.3, 0.1, 0.4, 0.7], "roi_factor": 2, "face_every": 5,
+}
+
+# key yang ikut disimpan di preset (look), dan subset yang mempengaruhi atlas/LUT
+PRESET_KEYS = ("cols", "rows", "cell_w", "cell_h", "ascii_chars",
+               "font", "font_scale", "duo1", "duo2", "bg",
+               "glyph_mode", "shape_grid", "color_mode", "palette")
+RENDER_KEYS = ("ascii_chars", "cell_w", "cell_h", "font", "font_scale",
+               "duo1", "duo2", "bg")
+
+# nama font -> atribut cv2.FONT_HERSHEY_*
+FONTS = {
+    "simplex": "FONT_HERSHEY_SIMPLEX",
+    "plain": "FONT_HERSHEY_PLAIN",
+    "duplex": "FONT_HERSHEY_DUPLEX",
+    "complex": "FONT_HERSHEY_COMPLEX",
+    "triplex": "FONT_HERSHEY_TRIPLEX",
+    "small": "FONT_HERSHEY_COMPLEX_SMALL",
+    "script": "FONT_HERSHEY_SCRIPT_SIMPLEX",
 }
 
+OUT_FORMATS = ("bgr", "i420", "nv12", "yuyv")
+ROI_MODES = ("off", "fixed", "face")
+GLYPH_MODES = ("brightness", "shape")
+COLOR_MODES = ("duotone", "color")
+# seberapa kuat pola sub-sel glyph menggeser fitur luminansinya (0..1)
+SHAPE_WEIGHT = 0.5
+
+
+# =========================
+# Startup profile & lazy deps
+# =========================
+def _process_age_ms():
+    """Umur proses (ms) sejak exec, dari /proc; None kalau tidak tersedia."""
+    try:
+        start_ticks = int(Path("/proc/self/stat").read_text().rsplit(")", 1)[1].split()[19])
+        uptime = float(Path("/proc/uptime").read_text().split()[0])
+        return (uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000.0
+    except Exception:
+        return None
+
+class StartupProfile:
+    """Catat durasi tiap langkah startup; dicetak kalau --startup-profile."""
+    def __init__(self):
+        self.enabled = False
+        self.t0 = time.perf_counter()
+        self.steps = []          # (name, ms)
+        self.first_frame_ms = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.steps.append((name, (time.perf_counter() - t) * 1000.0))
+
+    def first_frame(self):
+        if self.first_frame_ms is not None:
+            return
+        self.first_frame_ms = (time.perf_counter() - self.t0) * 1000.0
+        if self.enabled:
+            self.report()
+
+    def report(self):
+        age = _process_age_ms()
+        since_exec = (time.perf_counter() - self.t0) * 1000.0
+        print("[STARTUP] ---- startup breakdown ----")
+        if age is not None:
+            print(f"[STARTUP] {'exec -> module loaded':<32} {age - since_exec:8.1f} ms")
+        with self._lock:
+            steps = list(self.steps)
+        for name, ms in steps:
+            print(f"[STARTUP] {name:<32} {ms:8.1f} ms")
+        if self.first_frame_ms is not None:
+            print(f"[STARTUP] {'module -> first frame sent':<32} {self.first_frame_ms:8.1f} ms")
+
+STARTUP = StartupProfile()
+STARTUP.t0 = _T_MODULE
+
+# =========================
+# Tracing (Chrome Trace Event JSON)
+# =========================
+class Tracer:
+    """Ring buffer span per stage/thread (N detik terakhir), dump ke Chrome trace JSON.
+
+    Buka hasil dump di chrome://tracing atau https://ui.perfetto.dev.
+    Opsional: sampling stack Python semua thread tiap sample_ms.
+    """
+    def __init__(self, seconds=30.0):
+        self.enabled = False
+        self.path = None
+        self.seconds = float(seconds)
+        self.sample_ms = 0
+        self._pid = os.getpid()
+        self._events = deque()
+        self._samples = deque()
+        self._frames = {}          # (parent, name) -> id stackFrame
+        self._lock = threading.Lock()
+        self._sampler = None
+
+    @staticmethod
+    def _now_us():
+        return time.perf_counter() * 1e6
+
+    def _prune(self, q, now_us):
+        limit = now_us - self.seconds * 1e6
+        while q and q[0]["ts"] < limit:
+            q.popleft()
+
+    def add(self, name, t_start, t_end, cat="stream", args=None):
+        ev = {"name": name, "cat": cat, "ph": "X", "pid": self._pid,
+              "tid": threading.get_ident(), "ts": t_start * 1e6,
+              "dur": (t_end - t_start) * 1e6}
+        if args:
+            ev["args"] = args
+        with self._lock:
+            self._events.append(ev)
+            self._prune(self._events, ev["ts"])
+
+    @contextmanager
+    def span(self, name, cat="stream", **args):
+        if not self.enabled:
+            yield
+            return
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, t, time.perf_counter(), cat, args)
+
+    def configure(self, enabled=None, seconds=None, sample_ms=None, path=None):
+        if seconds is not None:
+            self.seconds = max(1.0, float(seconds))
+        if path is not None:
+            self.path = path
+        if sample_ms is not None:
+            self.sample_ms = max(0, int(sample_ms))
+        if enabled is not None:
+            enabled = bool(enabled)
+            if enabled and not self.enabled:
+                # sesi baru; saat dimatikan buffer dibiarkan supaya masih bisa di-dump
+                with self._lock:
+                    self._events.clear(); self._samples.clear()
+            self.enabled = enabled
+        if self.enabled and self.sample_ms > 0 and not (self._sampler and self._sampler.is_alive()):
+            self._sampler = threading.Thread(target=self._sample_loop, name="trace-sampler", daemon=True)
+            self._sampler.start()
+
+    def _frame_id(self, parent, name):
+        key = (parent, name)
+        sf = self._frames.get(key)
+        if sf is None:
+            sf = self._frames[key] = len(self._frames) + 1
+        return sf
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        while self.enabled and self.sample_ms > 0:
+            ts = self._now_us()
+            # walk stack di luar lock: TRACER.add di thread stream tidak ikut nunggu.
+            # _frames cuma ditulis thread ini; dump meng-copy-nya di bawah lock.
+            batch = []
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    co = frame.f_code
+                    stack.append(f"{co.co_name} ({Path(co.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                parent = None
+                for name in reversed(stack):
+                    parent = self._frame_id(parent, name)
+                batch.append({"cpu": 0, "tid": tid, "ts": ts, "name": "sample",
+                              "sf": str(parent), "weight": 1})
+            with self._lock:
+                self._samples.extend(batch)
+                self._prune(self._samples, ts)
+            time.sleep(self.sample_ms / 1000.0)
+
+    def status(self):
+        with self._lock:
+            return {"enabled": self.enabled, "path": self.path, "seconds": self.seconds,
+                    "sample_ms": self.sample_ms, "events": len(self._events),
+                    "samples": len(self._samples)}
+
+    def dump(self, path=None):
+        path = Path(path or self.path or (CONFIG_DIR / "trace.json"))
+        names = {t.ident: t.name for t in threading.enumerate()}
+        with self._lock:
+            events = list(self._events)
+            samples = list(self._samples)
+            known = list(self._frames.items())      # copy atomik (GIL); sampler bisa sedang menambah
+            if not self.enabled:
+                self._events.clear(); self._samples.clear()    # trace sudah mati & sudah di-dump
+        frames = {str(sf): {"category": "python", "name": name,
+                            **({"parent": str(parent)} if parent else {})}
+                  for (parent, name), sf in known}
+        tids = {e["tid"] for e in events} | {s["tid"] for s in samples}
+        meta = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid,
+                 "args": {"name": names.get(tid, str(tid))}} for tid in tids]
+        data = {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+        if samples:
+            data.update(stackFrames=frames, samples=samples)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data))
+        print(f"[INFO] trace dumped: {path} ({len(events)} spans, {len(samples)} samples)")
+        return str(path), len(events)
+
+TRACER = Tracer()
+
+def dump_trace_on_exit():
+    """Dump ring buffer ke FILE --trace saat proses selesai (exit normal, sys.exit, sinyal)."""
+    if TRACER.path and (TRACER.enabled or TRACER.status()["events"]):
+        try:
+            TRACER.dump()
+        except Exception as e:
+            print(f"[WARN] trace dump failed: {e}")
+
+def load_deps(cam=True):
+    """Import numpy/cv2 (+ pyvirtualcam) hanya saat mode yang butuh jalan."""
+    global cv2, np, pyvirtualcam
+    if np is None:
+        with STARTUP.span("import numpy"):
+            import numpy as _np
+        np = _np
+    if cv2 is None:
+        with STARTUP.span("import cv2"):
+            import cv2 as _cv2
+        cv2 = _cv2
+    if cam and pyvirtualcam is None:
+        with STARTUP.span("import pyvirtualcam"):
+            import pyvirtualcam as _pvc
+        pyvirtualcam = _pvc
+
+def load_flask():
+    global Flask, request, redirect, render_template_string, jsonify
+    if Flask is not None:
+        return True
+    try:
+        with STARTUP.span("import flask"):
+            import flask as _flask
+    except Exception:
+        return False
+    Flask, request, redirect = _flask.Flask, _flask.request, _flask.redirect
+    render_template_string, jsonify = _flask.render_template_string, _flask.jsonify
+    return True
+
 
 # =========================
 # Utility: colors & drawing
@@ -61,34 +327,340 @@ def lerp_color(c1, c2, t: np.ndarray):
     out = c1_arr*(1.0 - t3) + c2_arr*t3
     return out.astype(np.uint8)
 
-def to_ascii_duotone(frame_bgr: np.ndarray, cols: int, rows: int,
-                     ascii_chars: str, cell_w: int, cell_h: int,
-                     color1_bgr, color2_bgr, bg_bgr):
+def font_face(name: str):
+    return getattr(cv2, FONTS.get(str(name).lower(), FONTS["simplex"]))
+
+def build_glyph_atlas(ascii_chars: str, cell_w: int, cell_h: int,
+                      font="simplex", font_scale=0.35):
+    """Render tiap glyph sekali ke mask (L, cell_h, cell_w) float32 0..1."""
+    baseline_offset = cell_h - 2
+    atlas = np.zeros((len(ascii_chars), cell_h, cell_w), dtype=np.uint8)
+    for k, ch in enumerate(ascii_chars):
+        cv2.putText(atlas[k], ch, (0, baseline_offset),
+                    font_face(font), float(font_scale), 255, 1, cv2.LINE_AA)
+    return atlas.astype(np.float32) / 255.0
+
+# BT.601 limited range, kolom B, G, R (dipakai cuma untuk LUT/grid sel kecil)
+YUV601 = ((0.098, 0.504, 0.257), (0.439, -0.291, -0.148), (-0.071, -0.368, 0.439))
+
+def bgr_to_yuv601(bgr):
+    bgr = np.asarray(bgr, dtype=np.float32)
+    yuv = bgr @ np.array(YUV601, dtype=np.float32).T + np.array((16, 128, 128), dtype=np.float32)
+    return np.clip(yuv + 0.5, 0, 255).astype(np.uint8)
+
+class RenderState:
+    """Data precomputed untuk satu look: glyph atlas + LUT gray -> tile sel."""
+    def __init__(self, ascii_chars, cell_w, cell_h, font, font_scale,
+                 duo1, duo2, bg):
+        load_deps(cam=False)
+        self.cell_w, self.cell_h = int(cell_w), int(cell_h)
+        color1_bgr = hex_to_bgr(duo1) if isinstance(duo1, str) else duo1
+        color2_bgr = hex_to_bgr(duo2) if isinstance(duo2, str) else duo2
+        if bg is None or (isinstance(bg, str) and bg.lower() == "none"):
+            bg_bgr = (0, 0, 0)
+        else:
+            bg_bgr = hex_to_bgr(bg) if isinstance(bg, str) else bg
+
+        L = len(ascii_chars)
+        gray = np.arange(256, dtype=np.int32)
+        self.idx_lut = (gray * (L - 1)) // 255
+        t = (gray / 255.0).astype(np.float32).reshape(1, -1)
+        self.color_lut = lerp_color(color1_bgr, color2_bgr, t)[0]          # (256, 3)
+        self.atlas = build_glyph_atlas(ascii_chars, self.cell_w, self.cell_h,
+                                       font, font_scale)                    # (L, ch, cw)
+        self.bg = np.array(bg_bgr, dtype=np.float32)
+
+        # tile sel siap pakai untuk tiap level gray: bg*(1-m) + color*m
+        m = self.atlas[self.idx_lut][..., None]                             # (256, ch, cw, 1)
+        col = self.color_lut.astype(np.float32)[:, None, None, :]
+        self.tiles = (self.bg * (1.0 - m) + col * m).astype(np.uint8)     # (256, ch, cw, 3)
+
+        self._shape_index = {}
+        self._glyph_tiles = None
+        self._bg_canvas = None
+
+        # versi YUV: warna duotone cuma 256 entri, konversi sekali di sini
+        self.yuv_lut = bgr_to_yuv601(self.color_lut)                        # (256, 3)
+        self.bg_yuv = bgr_to_yuv601(self.bg).astype(np.float32)            # (3,)
+        self.coverage = self.atlas.mean(axis=(1, 2))                        # (L,)
+        m = self.atlas[self.idx_lut]                                        # (256, ch, cw)
+        self.tiles_y = (self.bg_yuv[0] * (1.0 - m)
+                        + self.yuv_lut[:, 0, None, None] * m).astype(np.uint8)
+        self._bg_y = None
+
+    def render(self, gray: np.ndarray):
+        """gray (rows, cols) uint8 -> canvas (rows*cell_h, cols*cell_w, 3)."""
+        rows, cols = gray.shape
+        cells = self.tiles[gray]                                            # (r, c, ch, cw, 3)
+        return cells.transpose(0, 2, 1, 3, 4).reshape(
+            rows * self.cell_h, cols * self.cell_w, 3)
+
+    def compose(self, idx: np.ndarray, colors: np.ndarray):
+        """Glyph per sel (rows, cols) + warna bebas per sel (rows, cols, 3) -> canvas."""
+        rows, cols = idx.shape
+        h, w = rows * self.cell_h, cols * self.cell_w
+        m = self.atlas[idx].transpose(0, 2, 1, 3).reshape(h, w)            # (H, W) 0..1
+        # faktor skala bulat -> INTER_NEAREST = replikasi warna sel persis
+        fg = cv2.resize(colors, (w, h), interpolation=cv2.INTER_NEAREST)
+        return cv2.blendLinear(fg, self.bg_canvas(h, w), m, 1.0 - m)
+
+    def bg_canvas(self, h, w):
+        if self._bg_canvas is None or self._bg_canvas.shape[:2] != (h, w):
+            self._bg_canvas = np.empty((h, w, 3), dtype=np.uint8)
+            self._bg_canvas[:] = self.bg.astype(np.uint8)
+        return self._bg_canvas
+
+    def shape_index(self, s: int):
+        """Fitur luminansi sub-grid s x s tiap glyph: (L, s*s) + norm kuadratnya."""
+        hit = self._shape_index.get(s)
+        if hit is not None:
+            return hit
+        L = self.atlas.shape[0]
+        cov = np.stack([cv2.resize(a, (s, s), interpolation=cv2.INTER_AREA)
+                        for a in self.atlas]).reshape(L, s * s)
+        dev = cov - cov.mean(axis=1, keepdims=True)
+        span = float(np.abs(dev).max()) or 1.0
+        # level ramp (sama dgn mode brightness) digeser pola tinta: tinta = lebih gelap
+        level = (np.arange(L, dtype=np.float32) * 255.0 / max(L - 1, 1))[:, None]
+        feats = np.clip(level - dev * (SHAPE_WEIGHT * 255.0 / span), 0, 255).astype(np.float32)
+        hit = (feats, (feats * feats).sum(axis=1))
+        self._shape_index[s] = hit
+        return hit
+
+    def shape_glyphs(self, sub_gray: np.ndarray, s: int):
+        """sub_gray (rows*s, cols*s) -> (glyph nearest-neighbor, mean gray) per sel."""
+        rows, cols = sub_gray.shape[0] // s, sub_gray.shape[1] // s
+        feats = sub_gray.reshape(rows, s, cols, s).transpose(0, 2, 1, 3) \
+                        .reshape(rows * cols, s * s).astype(np.float32)
+        G, G2 = self.shape_index(s)
+        # argmin ||f - g||^2 = argmin (||g||^2 - 2 f.g); ||f||^2 konstan per sel
+        idx = (G2[None, :] - 2.0 * (feats @ G.T)).argmin(axis=1).reshape(rows, cols)
+        mean = (feats.mean(axis=1) + 0.5).astype(np.uint8).reshape(rows, cols)
+        return idx, mean
+
+    def render_shape(self, sub_gray: np.ndarray, s: int):
+        idx, mean = self.shape_glyphs(sub_gray, s)
+        rows, cols = idx.shape
+        cells = self.glyph_tiles()[idx, mean]                              # (r, c, ch, cw, 3)
+        return cells.transpose(0, 2, 1, 3, 4).reshape(
+            rows * self.cell_h, cols * self.cell_w, 3)
+
+    def glyph_tiles(self):
+        """Tile untuk tiap (glyph, gray): (L, 256, ch, cw, 3), dibangun sekali."""
+        if self._glyph_tiles is None:
+            m = self.atlas[:, None, :, :, None]                            # (L, 1, ch, cw, 1)
+            col = self.color_lut.astype(np.float32)[None, :, None, None, :]
+            self._glyph_tiles = (self.bg * (1.0 - m) + col * m).astype(np.uint8)
+        return self._glyph_tiles
+
+    def render_yuv(self, gray: np.ndarray, s: int = 1, colors: np.ndarray = None):
+        """Seperti render_grid tapi langsung ke plane: (Y canvas (H, W), UV (H/2, W/2, 2)).
+
+        Mask glyph di-blend ke Y; chroma rata per sel (dibobot coverage glyph).
+        """
+        if s <= 1:
+            idx, level = self.idx_lut[gray], gray
+        else:
+            idx, level = self.shape_glyphs(gray, s)
+        rows, cols = idx.shape
+        h, w = rows * self.cell_h, cols * self.cell_w
+        cell = self.yuv_lut[level] if colors is None else bgr_to_yuv601(colors)  # (r, c, 3)
+        if colors is None and s <= 1:
+            y = self.tiles_y[gray].transpose(0, 2, 1, 3).reshape(h, w)
+        else:
+            m = self.atlas[idx].transpose(0, 2, 1, 3).reshape(h, w)
+            fg = cv2.resize(np.ascontiguousarray(cell[..., 0]), (w, h), interpolation=cv2.INTER_NEAREST)
+            if self._bg_y is None or self._bg_y.shape != (h, w):
+                self._bg_y = np.full((h, w), self.bg_yuv[0], dtype=np.uint8)
+            y = cv2.blendLinear(fg, self._bg_y, m, 1.0 - m)
+        cov = self.coverage[idx][..., None]
+        bg_uv = self.bg_yuv[1:]
+        uv = (bg_uv + cov * (cell[..., 1:].astype(np.float32) - bg_uv) + 0.5).astype(np.uint8)
+        uv = cv2.resize(uv, (max(1, w // 2), max(1, h // 2)), interpolation=cv2.INTER_NEAREST)
+        return y, uv
+
+    def render_grid(self, gray: np.ndarray, s: int = 1, colors: np.ndarray = None):
+        """Dispatcher: duotone (tile LUT) atau full-color (colors per sel, rows x cols x 3)."""
+        if colors is None:
+            return self.render(gray) if s <= 1 else self.render_shape(gray, s)
+        idx = self.idx_lut[gray] if s <= 1 else self.shape_glyphs(gray, s)[0]
+        return self.compose(idx, colors)
+
+class RenderCache:
+    """LRU cache RenderState per look, supaya switch preset tidak rebuild."""
+    def __init__(self, maxsize=RENDER_CACHE_SIZE):
+        self.maxsize = max(1, int(maxsize))
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(look: dict):
+        return tuple(str(look.get(k, DEFAULT_CONFIG[k])) for k in RENDER_KEYS)
+
+    def get(self, look: dict) -> RenderState:
+        k = self.key(look)
+        with self._lock:
+            st = self._items.get(k)
+            if st is not None:
+                self._items.move_to_end(k)
+                return st
+        st = RenderState(**{n: look.get(n, DEFAULT_CONFIG[n]) for n in RENDER_KEYS})
+        with self._lock:
+            self._items[k] = st
+            self._items.move_to_end(k)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return st
+
+    def warm(self, looks):
+        for look in looks:
+            try:
+                self.get(look)
+            except Exception as e:
+                print(f"[WARN] warm render state failed: {e}")
+
+    def __len__(self):
+        return len(self._items)
+
+RENDER_CACHE = RenderCache()
+
+def look_subgrid(look: dict) -> int:
+    """Sub-sampel per sisi sel: 1 untuk mode brightness, 2..3 untuk mode shape."""
+    if str(look.get("glyph_mode", "brightness")) != "shape":
+        return 1
+    return max(2, min(3, int(look.get("shape_grid", 2))))
+
+def downscale(frame_bgr: np.ndarray, cols: int, rows: int):
+    """Satu resize INTER_AREA -> (warna rata-rata per sel BGR, gray)."""
     small = cv2.resize(frame_bgr, (cols, rows), interpolation=cv2.INTER_AREA)
-    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int32)
-    L = len(ascii_chars)
-    idx = (gray * (L - 1)) // 255
-    t = (gray / 255.0).astype(np.float32)
+    return small, cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+def downscale_gray(frame_bgr: np.ndarray, cols: int, rows: int):
+    return downscale(frame_bgr, cols, rows)[1]
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def palette_lut(palette: tuple):
+    """LUT 3D 32x32x32 (BGR >> 3) -> warna palet terdekat; biaya per frame tetap walau palet besar."""
+    pal = np.array([hex_to_bgr(c) for c in palette], dtype=np.float32)     # (P, 3)
+    centers = (np.arange(PALETTE_LUT_SIZE, dtype=np.float32) + 0.5) * (256 // PALETTE_LUT_SIZE)
+    grid = np.stack(np.meshgrid(centers, centers, centers, indexing="ij"), axis=-1).reshape(-1, 1, 3)
+    nearest = np.empty(grid.shape[0], dtype=np.intp)
+    for i in range(0, grid.shape[0], 4096):                                  # batasi memori utk palet besar
+        d = ((grid[i:i + 4096] - pal[None]) ** 2).sum(axis=-1)
+        nearest[i:i + 4096] = d.argmin(axis=1)
+    n = PALETTE_LUT_SIZE
+    return pal.astype(np.uint8)[nearest].reshape(n, n, n, 3)
+
+def parse_palette(value):
+    """'#000,#f00 #0f0' / list -> tuple hex tervalidasi (kosong = tanpa kuantisasi)."""
+    if not value:
+        return ()
+    items = re.split(r"[,\s]+", value.strip()) if isinstance(value, str) else list(value)
+    items = [c for c in items if c]
+    for c in items:
+        hex_to_bgr(c)
+    return tuple(items)
+
+def cell_colors(small_bgr: np.ndarray, s: int, palette=()):
+    """Warna rata-rata per sel dari hasil INTER_AREA (opsional dikuantisasi ke palet)."""
+    if s > 1:
+        h, w = small_bgr.shape[:2]
+        small_bgr = cv2.resize(small_bgr, (w // s, h // s), interpolation=cv2.INTER_AREA)
+    if palette:
+        shift = 8 - (PALETTE_LUT_SIZE.bit_length() - 1)
+        q = small_bgr >> shift
+        small_bgr = palette_lut(tuple(palette))[q[..., 0], q[..., 1], q[..., 2]]
+    return small_bgr
+
+def frame_bytes(fmt: str, width: int, height: int):
+    return {"bgr": width * height * 3, "i420": width * height * 3 // 2,
+            "nv12": width * height * 3 // 2, "yuyv": width * height * 2}[fmt]
+
+class PlanarOutput:
+    """Buffer output dalam format native device (I420/NV12/YUYV), ditulis per plane.
+
+    Buffer dipakai ulang tiap frame (cam.send menyalin isinya), jadi tidak ada
+    konversi BGR->YUV full-frame maupun alokasi frame baru per frame.
+    """
+    def __init__(self, fmt: str, width: int, height: int):
+        if fmt not in OUT_FORMATS[1:]:
+            raise ValueError(f"Unsupported planar format: {fmt}")
+        if width % 2 or height % 2:
+            raise ValueError(f"{fmt} butuh width/height genap, dapat {width}x{height}")
+        self.fmt, self.width, self.height = fmt, width, height
+        w, h = width, height
+        self.buf = np.empty(frame_bytes(fmt, w, h), dtype=np.uint8)
+        if fmt == "yuyv":
+            self.packed = self.buf.reshape(h, w // 2, 4)
+            self.y = np.empty((h, w), dtype=np.uint8)
+            self.uv = np.empty((h, w // 2, 2), dtype=np.uint8)      # chroma cuma subsample horizontal
+        else:
+            self.y = self.buf[:w * h].reshape(h, w)
+            if fmt == "nv12":
+                self.uv = self.buf[w * h:].reshape(h // 2, w // 2, 2)
+            else:
+                self.u = self.buf[w * h:w * h + w * h // 4].reshape(h // 2, w // 2)
+                self.v = self.buf[w * h + w * h // 4:].reshape(h // 2, w // 2)
+                self.uv = np.empty((h // 2, w // 2, 2), dtype=np.uint8)
+
+    def _pack(self):
+        if self.fmt == "i420":
+            self.u[:] = self.uv[..., 0]
+            self.v[:] = self.uv[..., 1]
+        elif self.fmt == "yuyv":
+            self.packed[..., 0] = self.y[:, 0::2]
+            self.packed[..., 1] = self.uv[..., 0]
+            self.packed[..., 2] = self.y[:, 1::2]
+            self.packed[..., 3] = self.uv[..., 1]
+        return self.buf
+
+    def write(self, y: np.ndarray, uv: np.ndarray):
+        """Y canvas + UV canvas (resolusi grid) -> skala ke ukuran output, tulis ke buffer."""
+        cv2.resize(y, (self.width, self.height), dst=self.y, interpolation=cv2.INTER_LINEAR)
+        cv2.resize(uv, (self.uv.shape[1], self.uv.shape[0]), dst=self.uv,
+                   interpolation=cv2.INTER_NEAREST)
+        return self._pack()
+
+    def write_bgr(self, frame_bgr: np.ndarray):
+        """Konversi full-frame sekali jalan (placeholder), bukan di hot path."""
+        frame_bgr = cv2.resize(frame_bgr, (self.width, self.height), interpolation=cv2.INTER_AREA)
+        yuv = bgr_to_yuv601(frame_bgr)
+        self.y[:] = yuv[..., 0]
+        cv2.resize(np.ascontiguousarray(yuv[..., 1:]), (self.uv.shape[1], self.uv.shape[0]),
+                   dst=self.uv, interpolation=cv2.INTER_AREA)
+        return self._pack()
+
+    def stamp_probe(self, counter: int):
+        probe_stamp(self.y, counter)
+        h, w = (64 // PROBE_COLS) * PROBE_BLOCK, PROBE_COLS * PROBE_BLOCK
+        sy = self.uv.shape[0] * h // self.height + 1
+        self.uv[:sy, :w // 2 + 1] = 128                               # chroma netral di area probe
+        return self._pack()
+
+def look_colors_fn(look: dict):
+    """Fungsi warna per sel untuk look ini, atau None untuk mode duotone."""
+    if str(look.get("color_mode", "duotone")) != "color":
+        return None
+    palette = parse_palette(look.get("palette"))
+    return lambda small, s: cell_colors(small, s, palette)
 
-    h, w = rows * cell_h, cols * cell_w
-    canvas = np.zeros((h, w, 3), dtype=np.uint8)
-    if bg_bgr is not None:
-        canvas[:] = bg_bgr
+def scene_change(gray: np.ndarray, last_gray: np.ndarray):
+    """Rata-rata abs diff (0..255) grid gray vs grid terakhir yang dirender."""
+    if last_gray is None or last_gray.shape != gray.shape:
+        return float("inf")
+    return cv2.norm(gray, last_gray, cv2.NORM_L1) / gray.size
 
-    baseline_offset = cell_h - 2
-    color_map = lerp_color(color1_bgr, color2_bgr, t)
-
-    for i in range(rows):
-        y = i * cell_h + baseline_offset
-        row_idx = idx[i]
-        row_col = color_map[i]
-        for j in range(cols):
-            ch = ascii_chars[int(row_idx[j])]
-            x = j * cell_w
-            color = tuple(int(v) for v in row_col[j])
-            cv2.putText(canvas, ch, (x, y),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.35, color, 1, cv2.LINE_AA)
-    return canvas
+def to_ascii_duotone(frame_bgr: np.ndarray, cols: int, rows: int,
+                     ascii_chars: str, cell_w: int, cell_h: int,
+                     color1_bgr, color2_bgr, bg_bgr,
+                     font="simplex", font_scale=0.35, state: RenderState = None):
+    if state is None:
+        state = RENDER_CACHE.get({
+            "ascii_chars": ascii_chars, "cell_w": cell_w, "cell_h": cell_h,
+            "font": font, "font_scale": font_scale,
+            "duo1": color1_bgr, "duo2": color2_bgr, "bg": bg_bgr,
+        })
+    return state.render(downscale_gray(frame_bgr, cols, rows))
 
 # ==================================
 # Config Helpers
@@ -99,9 +671,9 @@ def _ensure_cfg_dir():
     except Exception as e:
         print(f"[WARN] cannot create {CONFIG_DIR}: {e}")
 
-def save_current_config():
-    _ensure_cfg_dir()
-    data = {
+def current_config() -> dict:
+    """Snapshot CFG yang dipersist ke config.json."""
+    return {
         "in_index": CFG.in_index,
         "out_device": CFG.out_device,
         "video_nr": CFG.video_nr,
@@ -112,22 +684,227 @@ def save_current_config():
         "ascii_chars": CFG.ascii_chars,
         "duo1": CFG.duo1, "duo2": CFG.duo2,
         "bg": CFG.bg,
+        "font": CFG.font, "font_scale": CFG.font_scale,
+        "preset": CFG.preset,
+        "motion_threshold": CFG.motion_threshold,
+        "idle_after": CFG.idle_after, "idle_fps": CFG.idle_fps,
+        "glyph_mode": CFG.glyph_mode, "shape_grid": CFG.shape_grid,
+        "stall_timeout": CFG.stall_timeout, "backoff_max": CFG.backoff_max,
+        "color_mode": CFG.color_mode, "palette": list(CFG.palette),
+        "out_format": CFG.out_format,
+        "roi_mode": CFG.roi_mode, "roi": list(CFG.roi),
+        "roi_factor": CFG.roi_factor, "face_every": CFG.face_every,
     }
+
+def atomic_write_text(path: Path, text: str):
+    """Tulis ke file temp di folder yang sama lalu os.replace: file lama utuh kalau crash."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
     try:
-        CONFIG_FILE.write_text(json.dumps(data, indent=2))
-        print(f"[INFO] config saved: {CONFIG_FILE}")
-    except Exception as e:
-        print(f"[WARN] save config failed: {e}")
+        with open(tmp, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+def _is_int(v):
+    return isinstance(v, int) and not isinstance(v, bool)
+
+def _is_num(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+def _is_color(v):
+    return isinstance(v, str) and (v.strip().lower() == "none" or hex_to_bgr(v) is not None)
+
+# key -> validator; value yang gagal diganti default saat load
+CONFIG_SCHEMA = {
+    "in_index":    lambda v: v is None or (_is_int(v) and v >= 0),
+    "out_device":  lambda v: isinstance(v, str) and v.startswith("/dev/video"),
+    "video_nr":    lambda v: _is_int(v) and v >= 0,
+    "width":       lambda v: _is_int(v) and v > 0,
+    "height":      lambda v: _is_int(v) and v > 0,
+    "fps":         lambda v: _is_int(v) and v > 0,
+    "cols":        lambda v: _is_int(v) and v > 0,
+    "rows":        lambda v: _is_int(v) and v > 0,
+    "cell_w":      lambda v: _is_int(v) and v > 0,
+    "cell_h":      lambda v: _is_int(v) and v > 0,
+    "mirror":      lambda v: isinstance(v, bool),
+    "ascii_chars": lambda v: isinstance(v, str) and len(v) > 0,
+    "duo1":        _is_color,
+    "duo2":        _is_color,
+    "bg":          _is_color,
+    "font":        lambda v: v in FONTS,
+    "font_scale":  lambda v: _is_num(v) and v > 0,
+    "preset":      lambda v: v is None or (isinstance(v, str) and PRESET_NAME_RE.match(v)),
+    "motion_threshold": lambda v: _is_num(v) and v >= 0,
+    "idle_after":  lambda v: _is_num(v) and v >= 0,
+    "idle_fps":    lambda v: _is_num(v) and v >= 0,
+    "glyph_mode":  lambda v: v in GLYPH_MODES,
+    "shape_grid":  lambda v: _is_int(v) and 2 <= v <= 3,
+    "stall_timeout": lambda v: _is_num(v) and v > 0,
+    "backoff_max": lambda v: _is_num(v) and v > 0,
+    "color_mode":  lambda v: v in COLOR_MODES,
+    "palette":     lambda v: isinstance(v, list) and parse_palette(v) is not None,
+    "out_format":  lambda v: v in OUT_FORMATS,
+    "roi_mode":    lambda v: v in ROI_MODES,
+    "roi":         lambda v: isinstance(v, list) and parse_roi(v) is not None,
+    "roi_factor":  lambda v: _is_int(v) and v >= 2,
+    "face_every":  lambda v: _is_int(v) and v >= 1,
+}
+
+def config_value_ok(key: str, value) -> bool:
+    check = CONFIG_SCHEMA.get(key)
+    if check is None:
+        return False
+    try:
+        return bool(check(value))
+    except (TypeError, ValueError):
+        return False
+
+def validate_config(data) -> dict:
+    """Cek config hasil load terhadap CONFIG_SCHEMA; key asing dibuang, value invalid -> default."""
+    if not isinstance(data, dict):
+        raise ValueError(f"config harus object JSON, dapat {type(data).__name__}")
+    out = dict(DEFAULT_CONFIG)
+    for k, v in data.items():
+        if k not in CONFIG_SCHEMA:
+            print(f"[WARN] config: key tidak dikenal '{k}' diabaikan")
+            continue
+        if config_value_ok(k, v):
+            out[k] = v
+        else:
+            print(f"[WARN] config: {k}={v!r} invalid, pakai default {DEFAULT_CONFIG[k]!r}")
+    return out
+
+class ConfigStore:
+    """Persist config di background: perubahan beruntun digabung (debounce), tulis atomik,
+    dan tiap versi yang ditulis disimpan di history/ untuk rollback."""
+    def __init__(self, path: Path = CONFIG_FILE, history_dir: Path = CONFIG_HISTORY_DIR,
+                 debounce: float = 0.5, keep: int = CONFIG_HISTORY):
+        self.path = path
+        self.history_dir = history_dir
+        self.debounce = float(debounce)
+        self.keep = max(1, int(keep))
+        self.data = None
+        self.writes = 0
+        self._cond = threading.Condition()
+        self._io = threading.Lock()
+        self._pending = None          # (seq, data) yang belum ditulis
+        self._due = 0.0
+        self._seq = 0
+        self._written_seq = 0
+        self._last_text = None
+        self._thread = None
+
+    def update(self, data: dict = None):
+        """Catat state baru (default: CFG sekarang); ditulis setelah debounce, tidak blocking."""
+        data = dict(current_config() if data is None else data)
+        with self._cond:
+            self._seq += 1
+            self.data = data
+            self._pending = (self._seq, data)
+            self._due = time.monotonic() + self.debounce
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="config-store", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return self.path
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                delay = self._due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                seq, data = self._pending
+                self._pending = None
+            self._write(seq, data)
+
+    def flush(self):
+        """Tulis perubahan yang masih pending sekarang juga (exit / mode CLI)."""
+        with self._cond:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self._write(*pending)
+
+    def _write(self, seq: int, data: dict):
+        with self._io:
+            if seq <= self._written_seq:
+                return                        # sudah ada versi lebih baru yang ditulis
+            self._written_seq = seq
+            text = json.dumps(data, indent=2)
+            if text == self._last_text:
+                return
+            try:
+                _ensure_cfg_dir()
+                atomic_write_text(self.path, text)
+                self.history_dir.mkdir(parents=True, exist_ok=True)
+                versions = self.versions()
+                version = (versions[0] if versions else 0) + 1
+                atomic_write_text(self._version_path(version), text)
+                for old in versions[self.keep - 1:]:
+                    self._version_path(old).unlink(missing_ok=True)
+                self._last_text = text
+                self.writes += 1
+                print(f"[INFO] config saved: {self.path} (v{version})")
+            except Exception as e:
+                print(f"[WARN] save config failed: {e}")
+
+    def _version_path(self, version: int) -> Path:
+        return self.history_dir / f"config.{version:06d}.json"
+
+    def versions(self):
+        """Nomor versi di history, terbaru dulu."""
+        try:
+            names = [p.name for p in self.history_dir.glob("config.*.json")]
+        except OSError:
+            return []
+        return sorted((int(n.split(".")[1]) for n in names if n.split(".")[1].isdigit()), reverse=True)
+
+    def history(self):
+        out = []
+        for v in self.versions():
+            try:
+                out.append({"version": v, "saved_at": self._version_path(v).stat().st_mtime})
+            except OSError:
+                pass
+        return out
+
+    def load_version(self, version: int):
+        """Config tervalidasi dari history, atau None kalau tidak ada / rusak."""
+        path = self._version_path(int(version))
+        try:
+            return validate_config(json.loads(path.read_text()))
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            print(f"[WARN] history v{version} rusak: {e}")
+            return None
+
+CONFIG_STORE = ConfigStore()
+
+def save_current_config():
+    """Antri simpan CFG sekarang ke config.json (ditulis background, atomik)."""
+    return CONFIG_STORE.update()
 
 def load_last_config():
+    """config.json tervalidasi; kalau file rusak, fallback ke versi history terbaru yang valid."""
+    if not CONFIG_FILE.exists():
+        return None
     try:
-        if CONFIG_FILE.exists():
-            data = json.loads(CONFIG_FILE.read_text())
-            # merge defaults to guard missing keys
-            merged = {**DEFAULT_CONFIG, **data}
-            return merged
-    except Exception as e:
+        return validate_config(json.loads(CONFIG_FILE.read_text()))
+    except (OSError, ValueError) as e:
         print(f"[WARN] read config failed: {e}")
+    for v in CONFIG_STORE.versions():
+        data = CONFIG_STORE.load_version(v)
+        if data is not None:
+            print(f"[WARN] pakai config history v{v}")
+            return data
     return None
 
 def apply_config_to_runtime(data: dict):
@@ -146,6 +923,147 @@ def apply_config_to_runtime(data: dict):
     CFG.duo1       = data.get("duo1", CFG.duo1)
     CFG.duo2       = data.get("duo2", CFG.duo2)
     CFG.bg         = data.get("bg", CFG.bg)
+    CFG.font       = str(data.get("font", CFG.font))
+    CFG.font_scale = float(data.get("font_scale", CFG.font_scale))
+    CFG.preset     = data.get("preset", CFG.preset)
+    CFG.motion_threshold = float(data.get("motion_threshold", CFG.motion_threshold))
+    CFG.idle_after = float(data.get("idle_after", CFG.idle_after))
+    CFG.idle_fps   = float(data.get("idle_fps", CFG.idle_fps))
+    CFG.glyph_mode = str(data.get("glyph_mode", CFG.glyph_mode))
+    CFG.shape_grid = int(data.get("shape_grid", CFG.shape_grid))
+    CFG.stall_timeout = float(data.get("stall_timeout", CFG.stall_timeout))
+    CFG.backoff_max = float(data.get("backoff_max", CFG.backoff_max))
+    CFG.color_mode = str(data.get("color_mode", CFG.color_mode))
+    CFG.palette    = list(parse_palette(data.get("palette", CFG.palette)))
+    CFG.out_format = str(data.get("out_format", CFG.out_format))
+    CFG.roi_mode   = str(data.get("roi_mode", CFG.roi_mode))
+    CFG.roi        = list(parse_roi(data.get("roi", CFG.roi)))
+    CFG.roi_factor = int(data.get("roi_factor", CFG.roi_factor))
+    CFG.face_every = int(data.get("face_every", CFG.face_every))
+
+
+# ==================================
+# Preset library (named looks)
+# ==================================
+def _preset_path(name: str) -> Path:
+    if not isinstance(name, str) or not PRESET_NAME_RE.match(name):
+        raise ValueError(f"Invalid preset name: {name!r}")
+    return PRESET_DIR / f"{name}.json"
+
+def current_look() -> dict:
+    return {k: getattr(CFG, k) for k in PRESET_KEYS}
+
+def validate_look(data: dict) -> dict:
+    """Look lengkap (PRESET_KEYS) yang lolos CONFIG_SCHEMA; ValueError kalau ada value invalid."""
+    look = {k: data.get(k, DEFAULT_CONFIG[k]) for k in PRESET_KEYS}
+    look["palette"] = list(parse_palette(look["palette"]))
+    bad = [f"{k}={v!r}" for k, v in look.items() if not config_value_ok(k, v)]
+    if bad:
+        raise ValueError("invalid look: " + ", ".join(bad))
+    return look
+
+def warm_look(look: dict, roi_factor=None):
+    """Bangun semua yang lazy untuk look: atlas/LUT, index & tile shape, LUT palet, state ROI kasar."""
+    looks = [look] + ([coarse_look(look, max(2, int(roi_factor)))] if roi_factor else [])
+    sub = look_subgrid(look)
+    color = str(look.get("color_mode", "duotone")) == "color"
+    for lk in looks:
+        st = RENDER_CACHE.get(lk)
+        if color:                      # canvas bg compose, ukuran grid penuh
+            k = int(lk["cell_w"]) // int(look["cell_w"])
+            st.bg_canvas(int(look["rows"]) // k * st.cell_h, int(look["cols"]) // k * st.cell_w)
+        if sub > 1:
+            st.shape_index(sub)
+            if not color:
+                st.glyph_tiles()       # cuma dipakai render_shape duotone
+    palette = parse_palette(look.get("palette"))
+    if color and palette:
+        palette_lut(tuple(palette))
+
+def runtime_roi_factor():
+    return CFG.roi_factor if CFG.roi_mode in ROI_MODES[1:] else None
+
+def list_presets():
+    try:
+        return sorted(p.stem for p in PRESET_DIR.glob("*.json"))
+    except Exception:
+        return []
+
+def load_preset(name: str):
+    path = _preset_path(name)
+    if not path.exists():
+        return None
+    try:
+        data = json.loads(path.read_text())
+    except Exception as e:
+        print(f"[WARN] read preset {name} failed: {e}")
+        return None
+    # cuma ambil key look; sisanya (device, resolusi, fps) tidak disentuh
+    if not isinstance(data, dict):
+        raise ValueError(f"preset {name}: harus object JSON")
+    try:
+        return validate_look(data)
+    except ValueError as e:
+        raise ValueError(f"preset {name}: {e}")
+
+def save_preset(name: str, data: dict = None):
+    path = _preset_path(name)
+    look = current_look()
+    if data:
+        look.update({k: data[k] for k in PRESET_KEYS if k in data})
+    look = validate_look(look)     # jangan tulis look yang bakal mematikan stream
+    try:
+        PRESET_DIR.mkdir(parents=True, exist_ok=True)
+    except Exception as e:
+        print(f"[WARN] cannot create {PRESET_DIR}: {e}")
+    atomic_write_text(path, json.dumps(look, indent=2))
+    print(f"[INFO] preset saved: {path}")
+    return look
+
+def delete_preset(name: str):
+    path = _preset_path(name)
+    if not path.exists():
+        return False
+    path.unlink()
+    if CFG.preset == name:
+        CFG.preset = None
+    print(f"[INFO] preset deleted: {path}")
+    return True
+
+def warm_presets(names=None):
+    """Bangun atlas/LUT untuk preset (maks kapasitas cache) + look aktif."""
+    names = list_presets() if names is None else names
+    roi_factor = runtime_roi_factor()
+    per_look = 2 if roi_factor else 1      # state halus + kasar per look kalau ROI aktif
+    looks = []
+    for n in names[:RENDER_CACHE.maxsize // per_look - 1]:
+        try:
+            lk = load_preset(n)
+        except ValueError as e:
+            print(f"[WARN] {e}")
+            continue
+        if lk:
+            looks.append(lk)
+    for lk in looks + [current_look()]:
+        try:
+            warm_look(lk, roi_factor)
+        except Exception as e:
+            print(f"[WARN] warm render state failed: {e}")
+
+def activate_preset(name: str):
+    """Pasang look preset ke CFG; stream yang jalan ambil di frame berikutnya."""
+    look = load_preset(name)   # sudah lengkap & tervalidasi; ValueError kalau tidak
+    if look is None:
+        return None
+    # build semua (atau hit cache) SEBELUM stream melihatnya: frame pertama setelah switch tanpa stall
+    warm_look(look, runtime_roi_factor())
+    global LOOK_VERSION
+    with LOOK_LOCK:
+        for k, v in look.items():
+            setattr(CFG, k, v)
+        CFG.preset = name
+        LOOK_VERSION += 1
+    return look
 
 
 # ==================================
@@ -225,19 +1143,543 @@ def ensure_loopback(video_nr=10, label="ASCII Cam", exclusive_caps=1, verbose=Tr
 # =====================
 # Input camera helpers
 # =====================
+def open_camera(index, width=1280, height=720, fps=30):
+    """Buka /dev/video<index> (MJPG) dan tes satu frame; cap atau None."""
+    load_deps(cam=False)
+    cap = cv2.VideoCapture(index, cv2.CAP_V4L2)
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_FPS, max(1, fps))
+    ok, _ = cap.read()
+    if ok:
+        return cap
+    cap.release()
+    return None
+
 def find_working_camera(start_index=0, max_index=10, width=1280, height=720, fps=30):
     for i in range(start_index, max_index + 1):
-        cap = cv2.VideoCapture(i, cv2.CAP_V4L2)
-        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        cap.set(cv2.CAP_PROP_FPS, fps)
-        ok, _ = cap.read()
-        if ok:
+        cap = open_camera(i, width, height, fps)
+        if cap is not None:
             return cap, i
-        cap.release()
     return None, None
 
+def camera_by_id(index):
+    """Symlink /dev/v4l/by-id/* yang menunjuk ke /dev/video<index> (stabil walau nomor berubah)."""
+    try:
+        for link in sorted(Path("/dev/v4l/by-id").iterdir()):
+            if os.path.realpath(link) == f"/dev/video{index}":
+                return str(link)
+    except OSError:
+        pass
+    return None
+
+def index_from_path(path):
+    m = re.match(r"^/dev/video(\d+)$", os.path.realpath(path))
+    return int(m.group(1)) if m else None
+
+class CaptureSupervisor:
+    """Kamera input di thread sendiri: deteksi stall/read gagal, reopen dgn backoff.
+
+    Stream tetap mengirim frame terakhir (atau placeholder) selama reconnect,
+    jadi device output tidak pernah hilang di sisi consumer.
+    """
+    def __init__(self, in_index=None, fps=30, width=1280, height=720,
+                 stall_timeout=2.0, backoff_max=8.0, fail_streak=CAPTURE_FAIL_STREAK,
+                 source=None):
+        self.source = source           # objek mirip VideoCapture (mis. ReplaySource), ganti kamera
+        self.index = in_index
+        self.by_id = None
+        self.fps, self.width, self.height = fps, width, height
+        self.stall_timeout = float(stall_timeout)
+        self.backoff_max = float(backoff_max)
+        self.fail_streak = int(fail_streak)
+        self.decode_interval = 0.0     # >0: decode maks 1x per interval, sisanya grab()
+        self.state = "closed"
+        self.reconnects = 0
+        self.last_recovery_s = None
+        self.down_since = None
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+        self._last_ok = 0.0
+        self._gen = 0
+        self._running = False
+        self._thread = None
+
+    def open(self):
+        if self.source is not None:
+            cap, idx = self.source, self.index
+        elif self.index is None:
+            cap, idx = find_working_camera(width=self.width, height=self.height, fps=self.fps)
+        else:
+            cap, idx = open_camera(self.index, self.width, self.height, self.fps), self.index
+        if cap is None:
+            return False
+        self.index = idx
+        self.by_id = camera_by_id(idx) if idx is not None else None
+        self._cap = cap
+        self._last_ok = time.time()
+        self.state = "ok"
+        return True
+
+    def start(self):
+        self._running = True
+        self._spawn(self._gen, self._cap)
+
+    def stop(self):
+        self._running = False
+        with self._lock:
+            self._gen += 1
+        t = self._thread
+        if t and t.is_alive():
+            t.join(timeout=1.0)
+        self.state = "closed"
+
+    def latest(self):
+        with self._lock:
+            return self._frame, self._seq
+
+    def check(self):
+        """Watchdog, dipanggil tiap tick stream: read ngegantung > stall_timeout = reconnect."""
+        if self.state == "ok" and time.time() - self._last_ok > self.stall_timeout:
+            self._reconnect(f"tidak ada frame {self.stall_timeout:.1f}s")
+
+    @property
+    def device(self):
+        return "replay" if self.source is not None else f"/dev/video{self.index}"
+
+    def describe(self):
+        """Nama device untuk log: replay / /dev/videoN (+ path by-id)."""
+        return self.device + (f" ({self.by_id})" if self.by_id else "")
+
+    def status(self):
+        return {"state": self.state, "device": self.device, "by_id": self.by_id,
+                "reconnects": self.reconnects, "last_recovery_s": self.last_recovery_s}
+
+    def _spawn(self, gen, cap):
+        self._thread = threading.Thread(target=self._grab_loop, args=(gen, cap),
+                                        name=f"capture-{gen}", daemon=True)
+        self._thread.start()
+
+    def _grab_loop(self, gen, cap):
+        fails = 0; last_decode = 0.0
+        try:
+            while self._running and gen == self._gen:
+                now = time.time()
+                if self.decode_interval > 0 and now - last_decode < self.decode_interval:
+                    with TRACER.span("capture.grab", cat="capture"):
+                        ok, frame = cap.grab(), None     # buang frame tanpa decode
+                else:
+                    with TRACER.span("capture.read", cat="capture"):
+                        ok, frame = cap.read()
+                    if ok: last_decode = now
+                if gen != self._gen:
+                    break                            # sudah di-abandon watchdog
+                if ok:
+                    fails = 0
+                    with self._lock:
+                        self._last_ok = time.time()
+                        if frame is not None:
+                            self._frame = frame
+                            self._seq += 1
+                    continue
+                fails += 1
+                if fails >= self.fail_streak:
+                    self._reconnect(f"{fails} read gagal berturut-turut")
+                    break
+                time.sleep(0.02)
+        finally:
+            try: cap.release()
+            except: pass
+
+    def _reconnect(self, reason):
+        with self._lock:
+            if self.state != "ok" or not self._running:
+                return
+            self.state = "reconnecting"
+            self._gen += 1
+            gen = self._gen
+            old = self._thread
+        self.down_since = time.time()
+        print(f"[WARN] kamera input hilang ({reason}); reconnect...")
+        threading.Thread(target=self._reconnect_loop, args=(gen, old), daemon=True).start()
+
+    def _reconnect_loop(self, gen, old=None):
+        delay, attempt = 0.5, 0
+        waited = False
+        while self._running and gen == self._gen:
+            # handle lama dilepas _grab_loop (finally) begitu read()-nya return. read yang
+            # ngegantung di driver tidak bisa dipaksa; selama itu device tidak dibuka dobel,
+            # recovery baru jalan setelah read lama timeout/return.
+            if old is not None and old is not threading.current_thread() and old.is_alive():
+                old.join(timeout=delay)
+                if old.is_alive():
+                    if not waited:
+                        print("[WARN] read kamera lama masih ngegantung; tunggu handle dilepas")
+                        waited = True
+                    delay = min(delay * 2, self.backoff_max)
+                    continue
+            attempt += 1
+            # kamera sudah dikenal lewat by-id: cuma buka lewat link itu (nomor /dev/videoN
+            # lama bisa jadi milik kamera lain setelah re-enumerate); link hilang = tunggu
+            if self.by_id:
+                idx = index_from_path(self.by_id) if os.path.exists(self.by_id) else None
+            else:
+                idx = self.index
+            if self.source is not None:
+                cap = self.source
+            else:
+                cap = open_camera(idx, self.width, self.height, self.fps) if idx is not None else None
+            if cap is not None:
+                if gen != self._gen or not self._running:
+                    cap.release(); return
+                self.last_recovery_s = round(time.time() - self.down_since, 2)
+                self.reconnects += 1
+                self.index = idx
+                if idx is not None:
+                    self.by_id = camera_by_id(idx) or self.by_id
+                self._cap = cap
+                with self._lock:
+                    self._last_ok = time.time()
+                    self.state = "ok"
+                print(f"[INFO] kamera input pulih: {self.describe()} setelah "
+                      f"{self.last_recovery_s:.1f}s ({attempt} percobaan)")
+                self._spawn(gen, cap)
+                return
+            t_next = time.time() + delay
+            while self._running and gen == self._gen and time.time() < t_next:
+                time.sleep(0.05)
+            delay = min(delay * 2, self.backoff_max)
+
+def placeholder_frame(width, height, bg="#000000", text="NO SIGNAL"):
+    """Frame pengganti murah selagi kamera belum ada frame sama sekali."""
+    img = np.zeros((height, width, 3), dtype=np.uint8)
+    if isinstance(bg, str) and bg.lower() != "none":
+        img[:] = hex_to_bgr(bg)
+    (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)
+    cv2.putText(img, text, ((width - tw) // 2, (height + th) // 2),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (128, 128, 128), 2, cv2.LINE_AA)
+    return img
+
+# =============
+# Latency probe
+# =============
+# Pola biner di pojok kiri atas: 2 baris x 32 blok hitam/putih
+# = 24-bit frame counter + 32-bit timestamp (ms) + 8-bit checksum.
+PROBE_COLS  = 32
+PROBE_BLOCK = 6
+PROBE_SEED  = 0xA5   # supaya frame hitam polos tidak lolos checksum
+
+def _probe_checksum(payload: bytes):
+    return (sum(payload) & 0xFF) ^ PROBE_SEED
+
+def probe_bits(counter: int, ts_ms: int):
+    payload = (counter & 0xFFFFFF).to_bytes(3, "big") + (ts_ms & 0xFFFFFFFF).to_bytes(4, "big")
+    data = payload + bytes([_probe_checksum(payload)])
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))      # (64,)
+
+def probe_stamp(img: np.ndarray, counter: int, ts_ms: int = None):
+    """Tulis pola probe in-place ke pojok kiri atas (BGR atau plane Y)."""
+    if ts_ms is None:
+        ts_ms = int(time.time() * 1000)
+    bits = probe_bits(counter, ts_ms).reshape(-1, PROBE_COLS) * 255
+    block = np.repeat(np.repeat(bits, PROBE_BLOCK, 0), PROBE_BLOCK, 1).astype(np.uint8)
+    h, w = block.shape
+    if img.ndim == 3:
+        img[:h, :w] = block[..., None]
+    else:
+        img[:h, :w] = block
+    return img
+
+def probe_decode(img: np.ndarray):
+    """Baca pola probe dari frame; (counter, ts_ms) atau None kalau tidak valid."""
+    if img is None:
+        return None
+    n_rows = 64 // PROBE_COLS
+    h, w = n_rows * PROBE_BLOCK, PROBE_COLS * PROBE_BLOCK
+    if img.shape[0] < h or img.shape[1] < w:
+        return None
+    if img.ndim == 3:
+        img = cv2.cvtColor(img[:h, :w], cv2.COLOR_BGR2GRAY)
+    c = PROBE_BLOCK // 2
+    samples = img[c:h:PROBE_BLOCK, c:w:PROBE_BLOCK][:n_rows, :PROBE_COLS]
+    data = np.packbits((samples.reshape(-1) >= 128).astype(np.uint8)).tobytes()
+    if _probe_checksum(data[:7]) != data[7]:
+        return None
+    return int.from_bytes(data[:3], "big"), int.from_bytes(data[3:7], "big")
+
+class LatencyProbeReader:
+    """Consumer loopback: decode pola probe, hitung latency send->receive & frame loss.
+
+    source = path device (/dev/videoN) atau objek apa pun dengan .read() -> (ok, frame).
+    """
+    def __init__(self, source, window=1000):
+        self.source = source
+        self.latencies = []
+        self.window = int(window)
+        self.received = self.lost = self.dup = self.invalid = 0
+        self.last_counter = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if hasattr(self.source, "read"):
+            return self.source
+        cap = cv2.VideoCapture(self.source, cv2.CAP_V4L2)
+        if not cap.isOpened():
+            raise RuntimeError(f"cannot open {self.source} as consumer")
+        return cap
+
+    def feed(self, frame, now_ms=None):
+        res = probe_decode(frame)
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        with self._lock:
+            if res is None:
+                self.invalid += 1
+                return None
+            counter, ts_ms = res
+            if counter == self.last_counter:
+                self.dup += 1
+                return None
+            if self.last_counter is not None:
+                gap = (counter - self.last_counter) & 0xFFFFFF
+                if 1 < gap < 0x800000:      # mundur/restart stream tidak dihitung loss
+                    self.lost += gap - 1
+            self.last_counter = counter
+            self.received += 1
+            lat = ((now_ms - ts_ms) & 0xFFFFFFFF)
+            if lat < 0x80000000:
+                self.latencies.append(lat)
+                del self.latencies[:-self.window]
+            return lat
+
+    def run(self, stop_event: threading.Event = None, duration: float = None):
+        cap = self._open()
+        t_end = None if duration is None else time.time() + duration
+        try:
+            while (stop_event is None or stop_event.is_set()) and (t_end is None or time.time() < t_end):
+                ok, frame = cap.read()
+                if not ok:
+                    time.sleep(0.005); continue
+                self.feed(frame)
+        finally:
+            if cap is not self.source:
+                cap.release()
+
+    def stats(self):
+        with self._lock:
+            lat = sorted(self.latencies)
+            total = self.received + self.lost
+            out = {"received": self.received, "lost": self.lost, "dup": self.dup,
+                   "invalid": self.invalid,
+                   "loss_ratio": round(self.lost / total, 4) if total else 0.0}
+        if lat:
+            pick = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))]
+            out.update(latency_ms_mean=round(sum(lat) / len(lat), 1),
+                       latency_ms_p50=pick(0.50), latency_ms_p95=pick(0.95),
+                       latency_ms_max=lat[-1])
+        return out
+
+    def report(self):
+        st = self.stats()
+        total = st["received"] + st["lost"]
+        print(f"[LATENCY] frames {st['received']}, lost {st['lost']} "
+              f"({st['loss_ratio']*100:.1f}%), dup {st['dup']}, invalid {st['invalid']} (dari {total})")
+        if "latency_ms_mean" in st:
+            print(f"[LATENCY] latency ms: mean {st['latency_ms_mean']}  p50 {st['latency_ms_p50']}  "
+                  f"p95 {st['latency_ms_p95']}  max {st['latency_ms_max']}")
+        else:
+            print("[LATENCY] tidak ada pola probe terbaca (stream jalan dengan --latency-probe?)")
+        return st
+
+def probe_monitor(source, stop_event: threading.Event, every: float = 1.0):
+    """Reader in-process: buka loopback (atau sink dengan .read()) sebagai consumer, publish ke STATS.
+
+    Baru return setelah thread reader selesai, jadi device consumer sudah dilepas.
+    """
+    reader = LatencyProbeReader(source)
+    def _read():
+        try:
+            reader.run(stop_event)
+        except Exception as e:
+            print(f"[WARN] latency probe reader: {e}")
+    t = threading.Thread(target=_read, daemon=True)
+    t.start()
+    while stop_event.is_set() and t.is_alive():
+        STATS.update(latency=reader.stats())
+        time.sleep(every)
+    t.join()    # read() consumer yang sedang jalan harus return dulu (timeout V4L2 OpenCV)
+    STATS.update(latency=reader.stats())
+
+
+# ==========================================
+# Region of interest (kepadatan grid variabel)
+# ==========================================
+def parse_roi(value):
+    """'x,y,w,h' / list (pecahan 0..1 dari frame) -> tuple rect ter-clip; ValueError kalau invalid."""
+    if isinstance(value, str):
+        value = [v for v in re.split(r"[\s,]+", value.strip()) if v]
+    try:
+        x, y, w, h = (float(v) for v in value)
+    except (TypeError, ValueError):
+        raise ValueError(f"ROI harus 4 angka x,y,w,h (0..1): {value!r}")
+    x, y = min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+    w, h = min(w, 1.0 - x), min(h, 1.0 - y)
+    if w <= 0 or h <= 0:
+        raise ValueError(f"ROI kosong: {value!r}")
+    return (round(x, 4), round(y, 4), round(w, 4), round(h, 4))
+
+def coarse_look(look: dict, k: int) -> dict:
+    """Look untuk sel kasar: sel & font k kali lebih besar, sisanya sama."""
+    return {**look, "cell_w": int(look["cell_w"]) * k, "cell_h": int(look["cell_h"]) * k,
+            "font_scale": float(look.get("font_scale", DEFAULT_CONFIG["font_scale"])) * k}
+
+class RoiGrid:
+    """Layout kepadatan variabel: sel look di dalam ROI, sel k x lebih besar di luar.
+
+    cols/rows look tetap jadi kepadatan detail (di ROI); di luar ROI jumlah sel
+    turun k^2 kali. Ukuran canvas sama dengan grid seragam. Index layout (slice
+    canvas, crop input, ukuran grid ROI) cuma di-rebuild kalau ROI bergeser
+    lebih dari ROI_MOVE_CELLS sel kasar.
+    """
+    def __init__(self, look: dict, k: int = 2, rect=None):
+        self.k = max(2, int(k))
+        self.sub = look_subgrid(look)
+        self.colors_fn = look_colors_fn(look)
+        self.fine = RENDER_CACHE.get(look)
+        self.coarse = RENDER_CACHE.get(coarse_look(look, self.k))
+        self.cc = max(1, int(look["cols"]) // self.k)
+        self.rc = max(1, int(look["rows"]) // self.k)
+        self.cells = None          # ROI dalam sel kasar (x0, y0, x1, y1) atau None
+        self.rect = None           # ROI ter-snap, pecahan frame
+        self.rebuilds = 0
+        self._crop = None          # (shape input, slice y, slice x) untuk cells saat ini
+        self.set_rect(rect)
+
+    def snap(self, rect):
+        if rect is None:
+            return None
+        x, y, w, h = rect
+        x0, y0 = int(x * self.cc), int(y * self.rc)
+        x1 = min(self.cc, max(x0 + 1, int(np.ceil((x + w) * self.cc))))
+        y1 = min(self.rc, max(y0 + 1, int(np.ceil((y + h) * self.rc))))
+        return (x0, y0, x1, y1)
+
+    def set_rect(self, rect) -> bool:
+        """Pindah ROI; True kalau layout di-rebuild (geser signifikan / muncul / hilang)."""
+        cells = self.snap(rect)
+        if cells == self.cells or (cells is not None and self.cells is not None
+                                   and max(abs(a - b) for a, b in zip(cells, self.cells)) <= ROI_MOVE_CELLS):
+            return False
+        self.cells = cells
+        self._crop = None
+        self.rebuilds += 1
+        if cells is None:
+            self.rect = None
+            self.canvas_slice = None
+            return True
+        x0, y0, x1, y1 = cells
+        k, ch, cw = self.k, self.fine.cell_h, self.fine.cell_w
+        self.rect = (x0 / self.cc, y0 / self.rc, (x1 - x0) / self.cc, (y1 - y0) / self.rc)
+        self.fine_size = ((x1 - x0) * k, (y1 - y0) * k)                  # (cols, rows) sel halus
+        self.canvas_slice = (slice(y0 * k * ch, y1 * k * ch), slice(x0 * k * cw, x1 * k * cw))
+        return True
+
+    def _crop_for(self, shape):
+        if self._crop is None or self._crop[0] != shape:
+            h, w = shape[:2]
+            x0, y0, x1, y1 = self.cells
+            self._crop = (shape,
+                          slice(y0 * h // self.rc, max(y0 * h // self.rc + 1, y1 * h // self.rc)),
+                          slice(x0 * w // self.cc, max(x0 * w // self.cc + 1, x1 * w // self.cc)))
+        return self._crop[1:]
+
+    def downscale(self, frame_bgr: np.ndarray):
+        """-> (small, gray): list per region [kasar, halus]; halus cuma dari crop ROI."""
+        s = self.sub
+        small_c, gray_c = downscale(frame_bgr, self.cc * s, self.rc * s)
+        if self.cells is None:
+            return [small_c], [gray_c]
+        ys, xs = self._crop_for(frame_bgr.shape)
+        fc, fr = self.fine_size
+        small_f, gray_f = downscale(frame_bgr[ys, xs], fc * s, fr * s)
+        return [small_c, small_f], [gray_c, gray_f]
+
+    @staticmethod
+    def scene_change(gray, last_gray):
+        if last_gray is None or len(gray) != len(last_gray):
+            return float("inf")
+        return max(scene_change(g, l) for g, l in zip(gray, last_gray))
+
+    def _colors(self, small, i):
+        return self.colors_fn(small[i], self.sub) if self.colors_fn else None
+
+    def render(self, small, gray):
+        """Canvas BGR: grid kasar penuh, lalu grid halus ditempel di slice ROI."""
+        img = self.coarse.render_grid(gray[0], self.sub, self._colors(small, 0))
+        if self.cells is not None:
+            img[self.canvas_slice] = self.fine.render_grid(gray[1], self.sub, self._colors(small, 1))
+        return img
+
+    def render_yuv(self, small, gray):
+        y, uv = self.coarse.render_yuv(gray[0], self.sub, self._colors(small, 0))
+        if self.cells is not None:
+            fy, fuv = self.fine.render_yuv(gray[1], self.sub, self._colors(small, 1))
+            ys, xs = self.canvas_slice
+            y[ys, xs] = fy
+            uy, ux = ys.start // 2, xs.start // 2
+            h, w = min(fuv.shape[0], uv.shape[0] - uy), min(fuv.shape[1], uv.shape[1] - ux)
+            uv[uy:uy + h, ux:ux + w] = fuv[:h, :w]
+        return y, uv
+
+def face_cascade_path():
+    """Path cascade wajah frontal, atau None kalau build OpenCV tidak punya CascadeClassifier (OpenCV 5)."""
+    data_dir = getattr(getattr(cv2, "data", None), "haarcascades", None)
+    if getattr(cv2, "CascadeClassifier", None) is None or not data_dir:
+        return None
+    path = os.path.join(data_dir, "haarcascade_frontalface_default.xml")
+    return path if os.path.exists(path) else None
+
+class FaceTracker:
+    """ROI otomatis dari Haar cascade wajah, dijalankan tiap `every` frame di frame kecil."""
+    def __init__(self, every: int = 5, hold: float = 2.0, margin: float = 0.4, width: int = 320):
+        path = face_cascade_path()
+        if path is None:
+            raise RuntimeError("Haar cascade tidak tersedia di build OpenCV ini (butuh opencv-python<5)")
+        self.cascade = cv2.CascadeClassifier(path)
+        if self.cascade.empty():
+            raise RuntimeError("gagal load haarcascade_frontalface_default.xml")
+        self.every = max(1, int(every))
+        self.hold = float(hold)
+        self.margin = float(margin)
+        self.width = int(width)
+        self.rect = None
+        self._seen = 0.0
+        self._n = 0
+
+    def update(self, frame_bgr: np.ndarray):
+        """Rect wajah terakhir (pecahan frame, sudah diperlebar margin) atau None."""
+        self._n += 1
+        if (self._n - 1) % self.every:
+            return self.rect
+        h, w = frame_bgr.shape[:2]
+        scale = min(1.0, self.width / w)
+        small = cv2.resize(frame_bgr, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        gray = cv2.equalizeHist(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=1.15, minNeighbors=5, minSize=(24, 24))
+        now = time.time()
+        if len(faces):
+            fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+            sh, sw = gray.shape
+            m = self.margin
+            self.rect = parse_roi(((fx - m * fw) / sw, (fy - m * fh) / sh,
+                                   (1 + 2 * m) * fw / sw, (1 + 2 * m) * fh / sh))
+            self._seen = now
+        elif self.rect is not None and now - self._seen > self.hold:
+            self.rect = None
+        return self.rect
+
+
 # ===========
 # Shared cfg
 # ===========
@@ -258,16 +1700,72 @@ class Config:
         self.duo1 = "#FFFFFF"
         self.duo2 = "#FFFFFF"
         self.bg = "#000000"
+        self.font = "simplex"
+        self.font_scale = 0.35
+        self.preset = None
+        self.motion_threshold = 1.0   # mean abs diff grid gray (0..255); 0 = selalu render
+        self.idle_after = 5.0         # detik tanpa gerak sebelum polling kamera diturunkan
+        self.idle_fps = 0             # fps polling kamera saat idle; 0 = tidak throttle
+        self.glyph_mode = "brightness"  # "shape" = cocokkan pola sub-sel ke glyph
+        self.shape_grid = 2             # sub-grid per sel (2 -> 2x2, 3 -> 3x3)
+        self.color_mode = "duotone"     # "color" = warna rata-rata input per sel
+        self.palette = []               # kuantisasi mode color ke palet ini (kosong = off)
+        self.stall_timeout = 2.0        # detik tanpa frame kamera -> reconnect
+        self.backoff_max = 8.0          # batas backoff eksponensial reconnect (detik)
+        self.out_format = "bgr"         # format virtual cam: bgr / i420 / nv12 / yuyv
+        self.roi_mode = "off"           # "fixed" = rect roi, "face" = ikuti wajah (Haar)
+        self.roi = [0.3, 0.1, 0.4, 0.7] # x, y, w, h (pecahan frame) sel halus
+        self.roi_factor = 2             # sel di luar ROI k x lebih besar
+        self.face_every = 5             # deteksi wajah tiap N frame input
+        self.latency_probe = False      # diagnostik: stempel pola probe + baca balik (tidak disimpan)
+
+class StreamStats:
+    """Angka runtime stream (fps, skip ratio, CPU, ...) untuk log & /metrics."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def update(self, **kw):
+        with self._lock:
+            self._data.update(kw)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._data)
 
 CFG = Config()
+STATS = StreamStats()
 RUN_EVENT = threading.Event()
+LOOK_LOCK = threading.Lock()
+LOOK_VERSION = 0
 STREAM_THREAD = None
 CAP_REF = None
 
 # =========
 # Streaming
 # =========
-def stream_loop():
+def warm_up(look: dict, width: int, height: int, cap_w=1280, cap_h=720, planar=None,
+            roi_factor=None):
+    """Bayar biaya sekali-jalan (init OpenCV, alokasi, atlas/LUT) di dummy frame."""
+    with STARTUP.span("warm-up (dummy frame)"):
+        state = RENDER_CACHE.get(look)
+        if roi_factor:
+            RENDER_CACHE.get(coarse_look(look, max(2, int(roi_factor))))
+        sub = look_subgrid(look)
+        colors_fn = look_colors_fn(look)
+        dummy = np.zeros((cap_h, cap_w, 3), dtype=np.uint8)
+        small, gray = downscale(dummy, int(look["cols"]) * sub, int(look["rows"]) * sub)
+        colors = colors_fn(small, sub) if colors_fn else None
+        if planar is not None:
+            planar.write(*state.render_yuv(gray, sub, colors))
+        else:
+            img = state.render_grid(gray, sub, colors)
+            cv2.resize(img, (width, height), interpolation=cv2.INTER_LINEAR)
+        cv2.flip(dummy, 1)
+
+def stream_loop(source=None, sink=None):
+    # source/sink opsional (soak test): ganti kamera input & virtual cam
+    load_deps()
     # ---- SNAPSHOT konfigurasi agar tidak berubah di tengah jalan ----
     in_index   = CFG.in_index
     out_device = CFG.out_device
@@ -279,65 +1777,189 @@ def stream_loop():
     width  = int(CFG.width)
     height = int(CFG.height)
     fps    = int(CFG.fps)
-    cols   = int(CFG.cols)
-    rows   = int(CFG.rows)
-    cell_w = int(CFG.cell_w)
-    cell_h = int(CFG.cell_h)
     mirror = bool(CFG.mirror)
-    ascii_chars = str(CFG.ascii_chars)
-    duo1 = CFG.duo1
-    duo2 = CFG.duo2
-    bg   = CFG.bg
+    motion_thr = float(CFG.motion_threshold)
+    idle_after = float(CFG.idle_after)
+    idle_fps   = float(CFG.idle_fps)
+    latency_probe = bool(CFG.latency_probe)
+    stall_timeout = float(CFG.stall_timeout)
+    backoff_max   = float(CFG.backoff_max)
+    out_format = CFG.out_format if CFG.out_format in OUT_FORMATS else "bgr"
+    if out_format != "bgr" and (width % 2 or height % 2):
+        print(f"[WARN] {out_format} butuh resolusi genap ({width}x{height}), fallback ke bgr")
+        out_format = "bgr"
+    roi_mode   = CFG.roi_mode if CFG.roi_mode in ROI_MODES else "off"
+    roi_rect   = parse_roi(CFG.roi)
+    roi_factor = max(2, int(CFG.roi_factor))
+    face_every = int(CFG.face_every)
+    # look (grid, ramp, warna, font) boleh berubah live lewat preset
+    with LOOK_LOCK:
+        look_ver = LOOK_VERSION
+        look = current_look()
     # ----------------------------------------------------------------
 
-    if not ensure_loopback(video_nr=video_nr, label="ASCII Cam", exclusive_caps=1, verbose=True):
+    # output YUV: render langsung ke plane di buffer ini, tanpa konversi BGR di backend
+    planar = PlanarOutput(out_format, width, height) if out_format != "bgr" else None
+
+    # warm-up jalan paralel selagi loopback & kamera dibuka
+    warm = threading.Thread(target=warm_up, args=(look, width, height),
+                            kwargs={"planar": planar,
+                                    "roi_factor": roi_factor if roi_mode != "off" else None},
+                            daemon=True)
+    warm.start()
+
+    with STARTUP.span("ensure loopback (stream)"):
+        ok_loop = sink is not None or ensure_loopback(video_nr=video_nr, label="ASCII Cam",
+                                                      exclusive_caps=1, verbose=True)
+    if not ok_loop:
         print("[FATAL] loopback gagal.")
         return
 
-    # open input
-    if in_index is None:
-        cap, idx = find_working_camera()
-        if cap is None:
-            print("[FATAL] tidak ada kamera input.")
-            return
-        print(f"[INFO] Input camera: /dev/video{idx}")
-    else:
-        cap = cv2.VideoCapture(in_index, cv2.CAP_V4L2)
-        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-        cap.set(cv2.CAP_PROP_FPS, max(1, fps))
-        ok, _ = cap.read()
-        if not ok:
-            print(f"[FATAL] Cannot open /dev/video{in_index}")
+    # open input (supervisor: reconnect otomatis kalau kamera glitch)
+    sup = CaptureSupervisor(in_index, fps=fps, stall_timeout=stall_timeout,
+                            backoff_max=backoff_max, source=source)
+    with STARTUP.span("open input camera"):
+        if not sup.open():
+            if in_index is None:
+                print("[FATAL] tidak ada kamera input.")
+            else:
+                print(f"[FATAL] Cannot open /dev/video{in_index}")
             return
-        print(f"[INFO] Input camera: /dev/video{in_index}")
-
-    color1_bgr = hex_to_bgr(duo1)
-    color2_bgr = hex_to_bgr(duo2)
-    bg_bgr = None if (isinstance(bg,str) and bg.lower()=="none") else hex_to_bgr(bg)
+        print(f"[INFO] Input camera: {sup.describe()}")
+
+    warm.join()
+    # reader probe harus lepas device sebelum stream berikutnya reload v4l2loopback
+    probe_run = threading.Event(); probe_thread = None
+    state = RENDER_CACHE.get(look)
+    cols, rows = int(look["cols"]), int(look["rows"])
+    sub = look_subgrid(look)
+    colors_fn = look_colors_fn(look)
+    # ROI: sel halus di rect (tetap / ikut wajah), sel kasar di luar
+    tracker = None
+    if roi_mode == "face":
+        try:
+            tracker = FaceTracker(every=face_every)
+        except RuntimeError as e:
+            print(f"[WARN] face tracking off ({e}), pakai ROI tetap")
+    grid = RoiGrid(look, roi_factor, roi_rect) if roi_mode != "off" else None
 
     try:
-        with pyvirtualcam.Camera(width=width, height=height, fps=fps,
-                                 device=out_device, fmt=pyvirtualcam.PixelFormat.BGR) as cam:
-            print(f"[INFO] Streaming to {cam.device} at {width}x{height}@{fps}")
+        with STARTUP.span("open virtual cam"):
+            cam_ctx = sink if sink is not None else pyvirtualcam.Camera(
+                width=width, height=height, fps=fps,
+                device=out_device, fmt=pyvirtualcam.PixelFormat[out_format.upper()])
+        with cam_ctx as cam:
+            print(f"[INFO] Streaming to {cam.device} at {width}x{height}@{fps} ({out_format})")
+            if latency_probe:
+                print(f"[INFO] latency probe aktif, reader membaca {cam.device}")
+                probe_run.set()
+                # sink pengganti (NullSink) dibaca langsung; virtual cam asli lewat device-nya
+                probe_src = cam if hasattr(cam, "read") else cam.device
+                probe_thread = threading.Thread(target=probe_monitor, args=(probe_src, probe_run),
+                                                daemon=True)
+                probe_thread.start()
+            sup.start()
             t0 = time.time(); frames = 0
+            # motion gating: skip render kalau grid gray hampir sama dgn yang terakhir dirender
+            last_gray = None; out = None; last_seq = 0
+            still_since = None
+            win_t = time.time(); win_cpu = time.process_time()
+            # new = frame kamera baru; static = frame baru tapi render di-skip (motion gate);
+            # resent = tidak ada frame kamera baru, output lama dikirim ulang
+            win_new = win_rendered = win_static = win_resent = 0
+            metric = 0.0
+            STATS.update(stream_running=True, frames=0, rendered=0, skipped=0, resent=0)
             while RUN_EVENT.is_set():
-                ok, frame = cap.read()
-                if not ok:
-                    time.sleep(0.02); continue
-                if mirror:
-                    frame = cv2.flip(frame, 1)
-                ascii_img = to_ascii_duotone(
-                    frame_bgr=frame, cols=cols, rows=rows,
-                    ascii_chars=ascii_chars, cell_w=cell_w, cell_h=cell_h,
-                    color1_bgr=color1_bgr, color2_bgr=color2_bgr, bg_bgr=bg_bgr
-                )
-                out = cv2.resize(ascii_img, (width, height), interpolation=cv2.INTER_LINEAR)
-
+                idle = (idle_fps > 0 and still_since is not None
+                        and time.time() - still_since >= idle_after)
+                # idle: kamera cuma di-decode idle_fps kali/detik, sisanya grab() tanpa decode
+                sup.decode_interval = (1.0 / idle_fps) if idle else 0.0
+                t_tick = time.perf_counter()
+                sup.check()
+                frame, seq = sup.latest()
+                render = False
+                if frame is not None and seq != last_seq:
+                    last_seq = seq
+                    win_new += 1
+                    if mirror:
+                        with TRACER.span("mirror"):
+                            frame = cv2.flip(frame, 1)
+                    if LOOK_VERSION != look_ver:
+                        with LOOK_LOCK:
+                            look_ver = LOOK_VERSION
+                            look = current_look()
+                        state = RENDER_CACHE.get(look)
+                        cols, rows = int(look["cols"]), int(look["rows"])
+                        sub = look_subgrid(look)
+                        colors_fn = look_colors_fn(look)
+                        if grid is not None:
+                            grid = RoiGrid(look, roi_factor, grid.rect)
+                        last_gray = None
+                    if tracker is not None:
+                        with TRACER.span("face_detect"):
+                            face = tracker.update(frame)
+                        if grid.set_rect(face or roi_rect):
+                            last_gray = None
+                    if grid is not None:
+                        with TRACER.span("downscale"):
+                            small, gray = grid.downscale(frame)
+                        metric = grid.scene_change(gray, last_gray)
+                    else:
+                        with TRACER.span("downscale"):
+                            small, gray = downscale(frame, cols * sub, rows * sub)
+                        metric = scene_change(gray, last_gray)
+                    render = out is None or motion_thr <= 0 or metric >= motion_thr
+                    if not render:
+                        win_static += 1
+                        if still_since is None:
+                            still_since = time.time()
+                else:
+                    win_resent += 1
+
+                if render:
+                    with TRACER.span("render"):
+                        if grid is not None:
+                            if planar is not None:
+                                y_img, uv_img = grid.render_yuv(small, gray)
+                            else:
+                                ascii_img = grid.render(small, gray)
+                        else:
+                            colors = colors_fn(small, sub) if colors_fn else None
+                            if planar is not None:
+                                y_img, uv_img = state.render_yuv(gray, sub, colors)
+                            else:
+                                ascii_img = state.render_grid(gray, sub, colors)
+                    with TRACER.span("resize"):
+                        if planar is not None:
+                            out = planar.write(y_img, uv_img)
+                        else:
+                            out = cv2.resize(ascii_img, (width, height), interpolation=cv2.INTER_LINEAR)
+                    last_gray = gray
+                    still_since = None
+                    win_rendered += 1
+                else:
+                    # tidak ada frame baru / scene statis: kirim ulang output terakhir
+                    if out is None:
+                        out = placeholder_frame(width, height, look["bg"])
+                        if planar is not None:
+                            out = planar.write_bgr(out)
+
+                if latency_probe:
+                    with TRACER.span("probe_stamp"):
+                        if planar is not None:
+                            planar.stamp_probe(frames)
+                        else:
+                            probe_stamp(out, frames)
                 try:
-                    cam.send(out)
-                    cam.sleep_until_next_frame()
+                    with TRACER.span("send"):
+                        cam.send(out)
+                    STARTUP.first_frame()
+                    MEMORY.frame_tick()
+                    if TRACER.enabled:
+                        TRACER.add("frame", t_tick, time.perf_counter(), args={
+                            "n": frames, "rendered": render, "seq": seq})
+                    with TRACER.span("sleep_until_next_frame"):
+                        cam.sleep_until_next_frame()
                 except ValueError as ve:
                     # Hard guard: kalau tetap mismatch (harusnya tidak terjadi setelah snapshot), hentikan
                     print(f"[WARN] Frame size mismatch: {out.shape}. Stop & restart via /apply. {ve}")
@@ -345,14 +1967,350 @@ def stream_loop():
 
                 frames += 1
                 if frames % max(fps,1) == 0:
-                    fps_eff = frames / (time.time() - t0)
-                    print(f"[INFO] ~{fps_eff:.1f} fps")
+                    now = time.time(); cpu = time.process_time()
+                    fps_eff = frames / (now - t0)
+                    cpu_pct = 100.0 * (cpu - win_cpu) / max(now - win_t, 1e-6)
+                    # cuma frame kamera baru yang dihitung: ukuran efek motion gating saja
+                    skip_ratio = win_static / max(win_new, 1)
+                    snap = STATS.snapshot()
+                    STATS.update(fps=round(fps_eff, 2), frames=frames,
+                                 rendered=snap.get("rendered", 0) + win_rendered,
+                                 skipped=snap.get("skipped", 0) + win_static,
+                                 resent=snap.get("resent", 0) + win_resent,
+                                 skip_ratio=round(skip_ratio, 3), cpu_percent=round(cpu_pct, 1),
+                                 idle=idle, scene_change=round(min(metric, 255.0), 2),
+                                 capture=sup.status(),
+                                 roi=None if grid is None else {
+                                     "mode": roi_mode, "rect": grid.rect, "rebuilds": grid.rebuilds})
+                    print(f"[INFO] ~{fps_eff:.1f} fps, skip {skip_ratio*100:.0f}%, "
+                          f"resent {win_resent}, cpu {cpu_pct:.0f}%" + (" (idle)" if idle else ""))
+                    win_t, win_cpu = now, cpu
+                    win_new = win_rendered = win_static = win_resent = 0
     finally:
-        try: cap.release()
-        except: pass
+        probe_run.clear()
+        if probe_thread is not None:
+            probe_thread.join()
+        sup.stop()
+        if STARTUP.enabled and STARTUP.first_frame_ms is None:
+            STARTUP.report()
+        STATS.update(stream_running=False)
         print("[INFO] Stream stopped.")
 
 
+# =================================
+# Memory telemetry & soak test
+# =================================
+def rss_bytes():
+    """RSS saat ini (byte), atau None kalau /proc tidak ada (ru_maxrss cuma peak, tidak bisa buat slope)."""
+    try:
+        return int(Path("/proc/self/statm").read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+class MemoryMonitor:
+    """RSS + tracemalloc: snapshot periodik, site alokasi yang tumbuh, alokasi NumPy besar."""
+    def __init__(self, interval=60.0, top=10, large_bytes=LARGE_ALLOC_BYTES, history=1440):
+        self.interval = float(interval)
+        self.top = int(top)
+        self.large_bytes = int(large_bytes)
+        self.samples = deque(maxlen=history)       # (t, rss)
+        self.growth = []                            # site yang tumbuh sejak snapshot sebelumnya
+        self.numpy_large = {"blocks": 0, "bytes": 0}
+        self.frames = 0
+        self.large_alloc_frames = 0
+        self.frame_peak_max = 0
+        self._frame_base = 0
+        self._prev = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, use_tracemalloc=False, frames=1):
+        import tracemalloc
+        if use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.sample()
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="mem-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"[WARN] memory sample failed: {e}")
+
+    def sample(self):
+        import tracemalloc
+        rss = rss_bytes()
+        if rss is not None:
+            with self._lock:
+                self.samples.append((time.time(), rss))
+        if not tracemalloc.is_tracing():
+            return
+        snap = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        growth = []
+        if self._prev is not None:
+            for st in snap.compare_to(self._prev, "lineno"):
+                if st.size_diff <= 0:
+                    continue
+                fr = st.traceback[0]
+                growth.append({"site": f"{fr.filename}:{fr.lineno}", "size": st.size,
+                               "size_diff": st.size_diff, "count_diff": st.count_diff})
+                if len(growth) >= self.top:
+                    break
+        self._prev = snap
+        np_large = {"blocks": 0, "bytes": 0}
+        if np is not None:
+            dom = getattr(np.lib, "tracemalloc_domain", 389047)
+            for tr in snap.filter_traces([tracemalloc.DomainFilter(True, dom)]).traces:
+                if tr.size >= self.large_bytes:
+                    np_large["blocks"] += 1
+                    np_large["bytes"] += tr.size
+        with self._lock:
+            self.growth = growth
+            self.numpy_large = np_large
+
+    def frame_tick(self):
+        """Dipanggil tiap frame terkirim: ukur alokasi transien (peak) selama frame itu."""
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return
+        cur, peak = tracemalloc.get_traced_memory()
+        transient = max(0, peak - self._frame_base)
+        self.frames += 1
+        self.frame_peak_max = max(self.frame_peak_max, transient)
+        if transient >= self.large_bytes:
+            self.large_alloc_frames += 1
+        tracemalloc.reset_peak()
+        self._frame_base = cur
+
+    def slope_mb_per_hour(self, skip=0.0):
+        """Kemiringan RSS (least squares) dalam MB/jam, abaikan `skip` detik pertama."""
+        with self._lock:
+            pts = list(self.samples)
+        if pts:
+            pts = [p for p in pts if p[0] >= pts[0][0] + skip]
+        if len(pts) < 3:
+            return None
+        t0 = pts[0][0]
+        xs = [p[0] - t0 for p in pts]; ys = [p[1] for p in pts]
+        mx = sum(xs) / len(xs); my = sum(ys) / len(ys)
+        den = sum((x - mx) ** 2 for x in xs)
+        if den <= 0:
+            return None
+        slope = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / den   # byte/detik
+        return slope * 3600.0 / (1024 * 1024)
+
+    def summary(self):
+        with self._lock:
+            rss = self.samples[-1][1] if self.samples else rss_bytes()
+            first = self.samples[0][1] if self.samples else rss
+        slope = self.slope_mb_per_hour()
+        if rss is None:
+            return {"rss_mb": None, "rss_growth_mb": None, "rss_slope_mb_per_hour": None,
+                    "frames": self.frames, "large_alloc_frames": self.large_alloc_frames}
+        return {"rss_mb": round(rss / 1048576, 1),
+                "rss_growth_mb": round((rss - first) / 1048576, 1),
+                "rss_slope_mb_per_hour": None if slope is None else round(slope, 2),
+                "frames": self.frames, "large_alloc_frames": self.large_alloc_frames}
+
+    def report(self):
+        import tracemalloc
+        out = self.summary()
+        with self._lock:
+            out.update(monitor_running=self.running, interval_s=self.interval,
+                       tracemalloc=tracemalloc.is_tracing(),
+                       large_alloc_bytes=self.large_bytes,
+                       frame_peak_max_mb=round(self.frame_peak_max / 1048576, 2),
+                       numpy_large_blocks=dict(self.numpy_large),
+                       top_growth=list(self.growth),
+                       rss_samples=[(round(t, 1), r) for t, r in list(self.samples)[-120:]])
+        if tracemalloc.is_tracing():
+            cur, peak = tracemalloc.get_traced_memory()
+            out.update(traced_mb=round(cur / 1048576, 2))
+        return out
+
+MEMORY = MemoryMonitor()
+
+class ReplaySource:
+    """Pengganti cv2.VideoCapture untuk soak test: putar ulang file video
+    (loop) atau frame sintetis bergerak, dipacing ke fps seperti kamera."""
+    def __init__(self, path=None, fps=20, width=1280, height=720, n_synth=60):
+        self.fps = max(1, fps)
+        self._next = time.time()
+        self._i = 0
+        self._n = max(1, int(n_synth))
+        self._cap = None
+        if path:
+            self._cap = cv2.VideoCapture(path)
+            if not self._cap.isOpened():
+                raise RuntimeError(f"cannot open replay source {path}")
+        else:
+            # blob gaussian bergerak, digambar per frame ke buffer yang dipakai ulang:
+            # fixture tidak boleh mendominasi RSS yang diukur soak test
+            sigma = height / 5
+            self._w = width
+            self._gy = np.exp(-((np.arange(height) - height / 2) ** 2) / (2 * sigma ** 2)).astype(np.float32) * 255
+            self._gx = np.exp(-((np.arange(2 * width) - width) ** 2) / (2 * sigma ** 2)).astype(np.float32)
+            self._g = np.empty((height, width), dtype=np.float32)
+            self._gray = np.empty((height, width), dtype=np.uint8)
+            self._buf = np.empty((height, width, 3), dtype=np.uint8)
+
+    def _synth(self):
+        self._i = (self._i + 1) % self._n
+        cx = int(self._w * (0.5 + 0.3 * np.cos(2 * np.pi * self._i / self._n)))
+        np.multiply(self._gy[:, None], self._gx[None, self._w - cx:2 * self._w - cx], out=self._g)
+        np.copyto(self._gray, self._g, casting="unsafe")
+        return cv2.cvtColor(self._gray, cv2.COLOR_GRAY2BGR, dst=self._buf)
+
+    def _pace(self):
+        self._next += 1.0 / self.fps
+        delay = self._next - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self._next = time.time()
+
+    def read(self):
+        self._pace()
+        if self._cap is not None:
+            ok, frame = self._cap.read()
+            if not ok:
+                self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, frame = self._cap.read()
+            return ok, frame
+        return True, self._synth().copy()    # kamera asli juga alokasi frame baru
+
+    def grab(self):
+        self._pace()
+        if self._cap is not None:
+            return self._cap.grab()
+        self._i = (self._i + 1) % self._n     # grab tanpa decode: cukup majukan posisi
+        return True
+
+    def set(self, *_a):
+        return True
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass   # dipakai ulang saat reconnect supervisor; tutup lewat close()
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
+
+class NullSink:
+    """Pengganti pyvirtualcam.Camera: cek ukuran frame, pacing ke fps.
+
+    Frame terakhir disimpan (referensi, tanpa copy) supaya bisa dibaca balik lewat
+    read(), mis. oleh LatencyProbeReader.
+    """
+    def __init__(self, width, height, fps, device="null"):
+        self.width, self.height, self.fps = width, height, max(1, fps)
+        self.device = device
+        self.frames_sent = 0
+        self._next = time.time()
+        self._last = None
+        self._read_seq = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+    def send(self, frame):
+        if frame.ndim == 1:
+            if frame.size not in (frame_bytes(f, self.width, self.height) for f in OUT_FORMATS[1:]):
+                raise ValueError(f"unexpected buffer size: {frame.size}")
+        elif frame.shape[:2] != (self.height, self.width):
+            raise ValueError(f"unexpected frame shape: {frame.shape}")
+        with self._cond:
+            self._last = frame
+            self.frames_sent += 1
+            self._cond.notify_all()
+
+    def read(self, timeout=0.1):
+        """(ok, frame) seperti VideoCapture: tunggu frame baru; buffer YUV -> plane Y."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.frames_sent != self._read_seq, timeout):
+                return False, None
+            self._read_seq = self.frames_sent
+            frame = self._last
+        if frame.ndim == 1:
+            w, h = self.width, self.height
+            if frame.size == frame_bytes("yuyv", w, h):
+                return True, frame.reshape(h, w * 2)[:, 0::2]
+            return True, frame[:w * h].reshape(h, w)
+        return True, frame
+
+    def sleep_until_next_frame(self):
+        self._next += 1.0 / self.fps
+        delay = self._next - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self._next = time.time()
+
+def run_soak(duration, source=None, max_growth=20.0, warmup=None, use_tracemalloc=False):
+    """Putar ulang frame lewat stream_loop asli (tanpa kamera/loopback) dan cek RSS tidak terus naik."""
+    load_deps()
+    warmup = min(300.0, duration * 0.2) if warmup is None else warmup
+    MEMORY.interval = max(1.0, min(60.0, duration / 60.0))
+    src = ReplaySource(source, fps=CFG.fps, width=CFG.width, height=CFG.height)
+    sink = NullSink(CFG.width, CFG.height, CFG.fps)
+    print(f"[INFO] soak test {duration:.0f}s (warm-up {warmup:.0f}s, sample tiap {MEMORY.interval:.0f}s, "
+          f"batas {max_growth} MB/jam)")
+    MEMORY.start(use_tracemalloc=use_tracemalloc)
+    RUN_EVENT.set()
+    t = threading.Thread(target=stream_loop, kwargs={"source": src, "sink": sink},
+                         name="stream", daemon=True)
+    t.start()
+    t_end = time.time() + duration
+    try:
+        while time.time() < t_end and t.is_alive():
+            time.sleep(min(1.0, max(0.0, t_end - time.time())))
+    finally:
+        RUN_EVENT.clear()
+        t.join(timeout=5.0)
+        src.close()
+    MEMORY.sample()
+    MEMORY.stop()
+    slope = MEMORY.slope_mb_per_hour(skip=warmup)
+    rep = MEMORY.report()
+    print(f"[SOAK] frames terkirim {sink.frames_sent}, "
+          + ("RSS n/a (tanpa /proc)" if rep["rss_mb"] is None
+             else f"RSS {rep['rss_mb']} MB (+{rep['rss_growth_mb']} MB)")
+          + ", slope setelah warm-up: "
+          + ("n/a" if slope is None else f"{slope:.2f} MB/jam"))
+    for g in rep["top_growth"][:5]:
+        print(f"[SOAK]   +{g['size_diff']/1024:.1f} KiB  {g['site']}")
+    if slope is None:
+        print("[WARN] sampel RSS kurang untuk menilai tren (perpanjang --soak).")
+        return True
+    if slope > max_growth:
+        print(f"[FAIL] RSS terus naik {slope:.2f} MB/jam > {max_growth} MB/jam", file=sys.stderr)
+        return False
+    print("[SOAK] OK")
+    return True
+
+
 # ======
 # Web UI
 # ======
@@ -376,6 +2334,7 @@ HTML = """
   input[type="number"], input[type="text"], input[type="color"], input[type="url"]{
     width:100%;padding:8px;border-radius:8px;border:1px solid var(--muted);background:#0f0f12;color:var(--txt)
   }
+  select{width:100%;padding:8px;border-radius:8px;border:1px solid var(--muted);background:#0f0f12;color:var(--txt)}
   input[type="color"]{height:42px;padding:0}
   .actions{display:flex;gap:10px;margin-top:12px}
   button{background:var(--accent);border:none;color:#fff;padding:10px 14px;border-radius:8px;cursor:pointer}
@@ -468,6 +2427,50 @@ HTML = """
       <div></div>
     </div>
 
+    <!-- Color mode -->
+    <div class="row">
+      <label>Color Mode</label>
+      <select id="color_mode">
+        <option value="duotone">Duotone</option>
+        <option value="color">Full color (per cell)</option>
+      </select>
+      <div></div>
+    </div>
+
+    <div class="row">
+      <label>Palette</label>
+      <input id="palette" type="text" placeholder="#000000,#ff0000,... (kosong = tanpa kuantisasi)">
+      <div></div>
+    </div>
+
+    <div class="row">
+      <label>Output Format</label>
+      <select id="out_format">
+        <option value="bgr">BGR (kompatibel)</option>
+        <option value="i420">I420 (YUV, tanpa konversi)</option>
+        <option value="nv12">NV12 (YUV, tanpa konversi)</option>
+        <option value="yuyv">YUYV (YUV 4:2:2)</option>
+      </select>
+      <div></div>
+    </div>
+
+    <!-- ROI: sel halus di area tertentu, kasar di luar -->
+    <div class="row">
+      <label>Detail Region</label>
+      <select id="roi_mode">
+        <option value="off">Off (grid seragam)</option>
+        <option value="fixed">Fixed rect</option>
+        <option value="face">Ikuti wajah</option>
+      </select>
+      <div></div>
+    </div>
+
+    <div class="row">
+      <label>Region x,y,w,h</label>
+      <input id="roi" type="text" placeholder="0.3,0.1,0.4,0.7 (pecahan frame)">
+      <div></div>
+    </div>
+
     <!-- ASCII chars -->
     <div class="row">
         <label>ASCII Chars</label>
@@ -483,11 +2486,34 @@ HTML = """
       <div></div>
     </div>
 
+    <div class="row">
+      <label>Trace</label>
+      <div class="toggle">
+        <input type="checkbox" id="trace" onchange="toggleTrace()"><span>Record spans</span>
+      </div>
+      <button onclick="dumpTrace()">Dump</button>
+    </div>
+
     <div class="sep"></div>
     <div class="actions">
       <button onclick="apply()">Apply</button>
       <button class="stop" onclick="stop()">Stop</button>
     </div>
+
+    <div class="sep"></div>
+    <div class="row">
+      <label>Preset</label>
+      <div class="grid-2">
+        <select id="preset_sel"></select>
+        <input id="preset_name" type="text" placeholder="nama preset baru">
+      </div>
+      <div></div>
+    </div>
+    <div class="actions">
+      <button onclick="activatePreset()">Switch</button>
+      <button onclick="savePreset()">Save Preset</button>
+      <button class="stop" onclick="deletePreset()">Delete</button>
+    </div>
     <div class="small" id="status"></div>
   </div>
 
@@ -633,7 +2659,12 @@ async function apply(){
     duo2: normalizeHexLoose(val('c2_hex')) || '#ffffff',
     bg:   (val('bg_hex').trim().toLowerCase()==='none') ? 'none' : (normalizeHexLoose(val('bg_hex')) || '#000000'),
     mirror: checked('mirror'),
-    ascii: val('ascii') || "@%#*+=-:. "   // <--- baru
+    ascii: val('ascii') || "@%#*+=-:. ",   // <--- baru
+    color_mode: val('color_mode'),
+    palette: val('palette'),
+    out_format: val('out_format'),
+    roi_mode: val('roi_mode'),
+    roi: val('roi')
   };
   const r = await fetch('/apply', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(payload)});
   const j = await r.json();
@@ -679,14 +2710,99 @@ async function initFromConfig(){
     // mirror
     document.getElementById('mirror').checked = !!cfg.mirror;
     document.getElementById('ascii').value = cfg.ascii_chars || "@%#*+=-:. ";
+    document.getElementById('color_mode').value = cfg.color_mode || 'duotone';
+    document.getElementById('palette').value = (cfg.palette || []).join(',');
+    document.getElementById('out_format').value = cfg.out_format || 'bgr';
+    document.getElementById('roi_mode').value = cfg.roi_mode || 'off';
+    // build OpenCV tanpa Haar cascade: opsi ikuti wajah tidak bisa dipakai
+    document.querySelector('#roi_mode option[value="face"]').disabled = !cfg.face_tracking;
+    document.getElementById('roi').value = (cfg.roi || [0.3, 0.1, 0.4, 0.7]).join(',');
 
   }catch(e){
     console.warn('initFromConfig failed', e);
   }
 }
 
+/* ==========
+   Presets
+   ========== */
+function setStatus(j){ document.getElementById('status').innerText = j.message || JSON.stringify(j); }
+
+async function refreshPresets(){
+  try{
+    const r = await fetch('/presets');
+    const j = await r.json();
+    const sel = document.getElementById('preset_sel');
+    sel.innerHTML = '';
+    for(const name of j.presets){
+      const o = document.createElement('option');
+      o.value = name; o.textContent = name;
+      if(name === j.active) o.selected = true;
+      sel.appendChild(o);
+    }
+  }catch(e){
+    console.warn('refreshPresets failed', e);
+  }
+}
+
+async function activatePreset(){
+  const name = val('preset_sel');
+  if(!name) return;
+  const r = await fetch('/presets/'+encodeURIComponent(name)+'/activate', {method:'POST'});
+  setStatus(await r.json());
+  await initFromConfig();
+}
+
+async function savePreset(){
+  const name = val('preset_name').trim() || val('preset_sel');
+  if(!name) return;
+  const payload = {
+    cols: Number(val('cols_num')),
+    rows: Number(val('rows_num')),
+    duo1: normalizeHexLoose(val('c1_hex')) || '#ffffff',
+    duo2: normalizeHexLoose(val('c2_hex')) || '#ffffff',
+    bg:   (val('bg_hex').trim().toLowerCase()==='none') ? 'none' : (normalizeHexLoose(val('bg_hex')) || '#000000'),
+    ascii_chars: val('ascii') || "@%#*+=-:. ",
+    color_mode: val('color_mode'),
+    palette: val('palette')
+  };
+  const r = await fetch('/presets/'+encodeURIComponent(name), {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify(payload)});
+  setStatus(await r.json());
+  await refreshPresets();
+}
+
+async function deletePreset(){
+  const name = val('preset_sel');
+  if(!name) return;
+  const r = await fetch('/presets/'+encodeURIComponent(name), {method:'DELETE'});
+  setStatus(await r.json());
+  await refreshPresets();
+}
+
+/* ==========
+   Trace
+   ========== */
+async function toggleTrace(){
+  const r = await fetch('/trace', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({enabled: checked('trace')})});
+  setStatus(await r.json());
+}
+async function dumpTrace(){
+  const r = await fetch('/trace/dump', {method:'POST'});
+  setStatus(await r.json());
+}
+async function initTrace(){
+  try{
+    const r = await fetch('/trace');
+    document.getElementById('trace').checked = !!(await r.json()).enabled;
+  }catch(e){
+    console.warn('initTrace failed', e);
+  }
+}
+
 // Panggil saat halaman siap
 document.addEventListener('DOMContentLoaded', initFromConfig);
+document.addEventListener('DOMContentLoaded', initTrace);
+document.addEventListener('DOMContentLoaded', refreshPresets);
 </script>
 </body>
 </html>
@@ -694,6 +2810,8 @@ document.addEventListener('DOMContentLoaded', initFromConfig);
 
 
 def make_app():
+    load_deps()
+    load_flask()
     app = Flask(__name__)
 
     @app.route("/")
@@ -704,28 +2822,49 @@ def make_app():
     def apply():
         data = request.get_json(force=True)
 
-        # ← penting: apply in_index dari UI juga
-        CFG.in_index = data.get("in_index", CFG.in_index)
-
-        CFG.out_device = data.get("out_device", CFG.out_device)
-        CFG.width = int(data.get("width", CFG.width))
-        CFG.height = int(data.get("height", CFG.height))
-        CFG.fps = int(data.get("fps", CFG.fps))
-        CFG.cols = int(data.get("cols", CFG.cols))
-        CFG.rows = int(data.get("rows", CFG.rows))
-        CFG.duo1 = data.get("duo1", CFG.duo1)
-        CFG.duo2 = data.get("duo2", CFG.duo2)
-        CFG.bg = data.get("bg", CFG.bg)
-        CFG.mirror = bool(data.get("mirror", CFG.mirror))
-        CFG.ascii_chars = data.get("ascii", CFG.ascii_chars)
-
-        # ← penting: simpan config SETELAH apply
+        # parse semua field ke dict lokal dulu; CFG baru diubah kalau semuanya valid
         try:
-            save_current_config()
-            saved = str(CONFIG_FILE)
-        except Exception as e:
-            print(f"[WARN] save config failed: {e}")
-            saved = None
+            new = {
+                "in_index": data.get("in_index", CFG.in_index),   # ← penting: apply in_index dari UI juga
+                "out_device": data.get("out_device", CFG.out_device),
+                "width": int(data.get("width", CFG.width)),
+                "height": int(data.get("height", CFG.height)),
+                "fps": int(data.get("fps", CFG.fps)),
+                "cols": int(data.get("cols", CFG.cols)),
+                "rows": int(data.get("rows", CFG.rows)),
+                "duo1": data.get("duo1", CFG.duo1),
+                "duo2": data.get("duo2", CFG.duo2),
+                "bg": data.get("bg", CFG.bg),
+                "mirror": bool(data.get("mirror", CFG.mirror)),
+                "ascii_chars": data.get("ascii", CFG.ascii_chars),
+                "motion_threshold": float(data.get("motion_threshold", CFG.motion_threshold)),
+                "idle_after": float(data.get("idle_after", CFG.idle_after)),
+                "idle_fps": float(data.get("idle_fps", CFG.idle_fps)),
+                "glyph_mode": str(data.get("glyph_mode", CFG.glyph_mode)),
+                "shape_grid": int(data.get("shape_grid", CFG.shape_grid)),
+                "color_mode": str(data.get("color_mode", CFG.color_mode)),
+                "palette": list(parse_palette(data.get("palette", CFG.palette))),
+                "out_format": str(data.get("out_format", CFG.out_format)).lower(),
+                "roi_mode": str(data.get("roi_mode", CFG.roi_mode)).lower(),
+                "roi": list(parse_roi(data.get("roi", CFG.roi))),
+                "roi_factor": max(2, int(data.get("roi_factor", CFG.roi_factor))),
+                "face_every": max(1, int(data.get("face_every", CFG.face_every))),
+            }
+        except (TypeError, ValueError) as e:
+            return jsonify({"ok": False, "message": str(e)}), 400
+        # validator yang sama dengan preset & load_last_config
+        bad = [f"{k}={v!r}" for k, v in new.items() if not config_value_ok(k, v)]
+        if bad:
+            return jsonify({"ok": False, "message": "invalid config: " + ", ".join(bad)}), 400
+        if new["roi_mode"] == "face" and face_cascade_path() is None:
+            return jsonify({"ok": False, "message": "roi_mode=face butuh Haar cascade OpenCV "
+                                                    "(CascadeClassifier, opencv-python<5)"}), 400
+        with LOOK_LOCK:
+            for k, v in new.items():
+                setattr(CFG, k, v)
+
+        # ← penting: simpan config SETELAH apply (diantrikan, ditulis background)
+        saved = str(save_current_config())
 
         restart_stream()
         return jsonify({
@@ -752,16 +2891,130 @@ def make_app():
             "ascii_chars": CFG.ascii_chars,
             "duo1": CFG.duo1, "duo2": CFG.duo2,
             "bg": CFG.bg,
+            "font": CFG.font, "font_scale": CFG.font_scale,
+            "preset": CFG.preset,
+            "motion_threshold": CFG.motion_threshold,
+            "idle_after": CFG.idle_after, "idle_fps": CFG.idle_fps,
+            "glyph_mode": CFG.glyph_mode, "shape_grid": CFG.shape_grid,
+            "color_mode": CFG.color_mode, "palette": list(CFG.palette),
+            "out_format": CFG.out_format,
+            "roi_mode": CFG.roi_mode, "roi": list(CFG.roi),
+            "roi_factor": CFG.roi_factor, "face_every": CFG.face_every,
+            "face_tracking": face_cascade_path() is not None,
         }
         return jsonify(snap)
 
+    @app.route("/config/history", methods=["GET"])
+    def config_history():
+        return jsonify({"versions": CONFIG_STORE.history()})
+
+    @app.route("/config/rollback/<int:version>", methods=["POST"])
+    def config_rollback(version):
+        data = CONFIG_STORE.load_version(version)
+        if data is None:
+            return jsonify({"ok": False, "message": f"Config v{version} not found."}), 404
+        apply_config_to_runtime(data)
+        save_current_config()
+        restart_stream()
+        return jsonify({"ok": True, "message": f"Rolled back to config v{version}."})
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return jsonify({**STATS.snapshot(), "memory": MEMORY.summary()})
+
+    @app.route("/debug/memory", methods=["GET"])
+    def debug_memory():
+        if not MEMORY.running:
+            MEMORY.sample()
+        return jsonify(MEMORY.report())
+
+    @app.route("/debug/memory", methods=["POST"])
+    def debug_memory_toggle():
+        data = request.get_json(silent=True) or {}
+        if "interval" in data:
+            MEMORY.interval = max(1.0, float(data["interval"]))
+        if data.get("enabled", True):
+            MEMORY.start(use_tracemalloc=bool(data.get("tracemalloc", False)))
+        else:
+            MEMORY.stop()
+        return jsonify({"ok": True, **MEMORY.report()})
+
+    @app.route("/trace", methods=["GET"])
+    def trace_status():
+        return jsonify(TRACER.status())
+
+    @app.route("/trace", methods=["POST"])
+    def trace_toggle():
+        data = request.get_json(silent=True) or {}
+        TRACER.configure(enabled=data.get("enabled", True), seconds=data.get("seconds"),
+                         sample_ms=data.get("sample_ms"))
+        st = TRACER.status()
+        return jsonify({"ok": True, "message": f"Trace {'on' if st['enabled'] else 'off'}.", **st})
+
+    @app.route("/trace/dump", methods=["POST"])
+    def trace_dump():
+        data = request.get_json(silent=True) or {}
+        try:
+            path, n = TRACER.dump(data.get("path"))
+        except Exception as e:
+            return jsonify({"ok": False, "message": f"trace dump failed: {e}"}), 500
+        return jsonify({"ok": True, "message": f"Trace dumped ({n} spans) → {path}", "path": path})
+
+    @app.route("/presets", methods=["GET"])
+    def get_presets():
+        return jsonify({"presets": list_presets(), "active": CFG.preset,
+                        "cached": len(RENDER_CACHE)})
+
+    @app.route("/presets/<name>", methods=["GET"])
+    def get_preset(name):
+        try:
+            look = load_preset(name)
+        except ValueError as e:
+            return jsonify({"ok": False, "message": str(e)}), 400
+        if look is None:
+            return jsonify({"ok": False, "message": f"Preset '{name}' not found."}), 404
+        return jsonify(look)
+
+    @app.route("/presets/<name>", methods=["POST", "PUT"])
+    def put_preset(name):
+        data = request.get_json(silent=True) or {}
+        try:
+            look = save_preset(name, data)
+            warm_look(look, runtime_roi_factor())
+        except ValueError as e:
+            return jsonify({"ok": False, "message": str(e)}), 400
+        except Exception as e:
+            return jsonify({"ok": False, "message": f"save preset failed: {e}"}), 500
+        return jsonify({"ok": True, "message": f"Preset '{name}' saved.", "preset": look})
+
+    @app.route("/presets/<name>", methods=["DELETE"])
+    def remove_preset(name):
+        try:
+            ok = delete_preset(name)
+        except ValueError as e:
+            return jsonify({"ok": False, "message": str(e)}), 400
+        if not ok:
+            return jsonify({"ok": False, "message": f"Preset '{name}' not found."}), 404
+        return jsonify({"ok": True, "message": f"Preset '{name}' deleted."})
+
+    @app.route("/presets/<name>/activate", methods=["POST"])
+    def use_preset(name):
+        try:
+            look = activate_preset(name)
+        except ValueError as e:
+            return jsonify({"ok": False, "message": str(e)}), 400
+        if look is None:
+            return jsonify({"ok": False, "message": f"Preset '{name}' not found."}), 404
+        save_current_config()
+        return jsonify({"ok": True, "message": f"Preset '{name}' active.", "preset": look})
+
 
     return app
 
 def restart_stream():
     stop_stream()
     RUN_EVENT.set()
-    t = threading.Thread(target=stream_loop, daemon=True)
+    t = threading.Thread(target=stream_loop, name="stream", daemon=True)
     t.start()
     global STREAM_THREAD
     STREAM_THREAD = t
@@ -843,9 +3096,92 @@ def main():
     p.add_argument("--ui", action="store_true", help="Jalankan Web UI di http://127.0.0.1:8765")
     p.add_argument("--no-load-last", action="store_true",
                help="Jangan load config terakhir dari disk saat start.")
+    p.add_argument("--rollback", type=int, default=None, metavar="VERSION",
+                   help="Start dengan config versi VERSION dari history (lihat GET /config/history).")
+    p.add_argument("--font", type=str, default=None, choices=sorted(FONTS),
+                   help="Font Hershey untuk glyph (default simplex).")
+    p.add_argument("--font-scale", type=float, default=None, help="Skala font glyph (default 0.35).")
+    p.add_argument("--glyph-mode", type=str, default=None, choices=GLYPH_MODES,
+                   help="Pilih glyph dari brightness saja atau dari pola sub-sel (shape).")
+    p.add_argument("--shape-grid", type=int, default=None, choices=[2, 3],
+                   help="Sub-grid per sel untuk --glyph-mode shape (default 2).")
+    p.add_argument("--color-mode", type=str, default=None, choices=COLOR_MODES,
+                   help="duotone (default) atau color: tiap glyph pakai warna rata-rata input di selnya.")
+    p.add_argument("--palette", type=str, default=None,
+                   help='Kuantisasi --color-mode color ke palet, contoh: "#000000,#ff0000,#00ff00" ("" = off).')
+    p.add_argument("--out-format", type=str, default=None, choices=OUT_FORMATS,
+                   help="Format pixel virtual cam (default bgr). i420/nv12/yuyv = tulis plane YUV "
+                        "langsung, tanpa konversi BGR di backend; butuh width/height genap.")
+    p.add_argument("--roi-mode", type=str, default=None, choices=ROI_MODES,
+                   help="Sel halus (cols/rows) cuma di region: fixed = --roi, face = ikuti wajah "
+                        "(Haar cascade); di luar region sel --roi-factor kali lebih besar.")
+    p.add_argument("--roi", type=str, default=None, metavar="X,Y,W,H",
+                   help='Region detail dalam pecahan frame, contoh: "0.3,0.1,0.4,0.7".')
+    p.add_argument("--roi-factor", type=int, default=None,
+                   help="Ukuran sel kasar di luar region = N x sel halus (default 2).")
+    p.add_argument("--face-every", type=int, default=None,
+                   help="Deteksi wajah tiap N frame input (default 5).")
+
+    # Presets
+    p.add_argument("--preset", type=str, default=None, metavar="NAME",
+                   help="Pakai preset look bernama NAME (override config terakhir).")
+    p.add_argument("--save-preset", type=str, default=None, metavar="NAME",
+                   help="Simpan look saat ini (config + argumen CLI) sebagai preset lalu keluar.")
+    p.add_argument("--delete-preset", type=str, default=None, metavar="NAME",
+                   help="Hapus preset lalu keluar.")
+    p.add_argument("--list-presets", action="store_true", help="Tampilkan daftar preset lalu keluar.")
+
+    # Motion gating
+    p.add_argument("--motion-threshold", type=float, default=None,
+                   help="Skip render kalau rata-rata beda grid gray < nilai ini (0..255, default 1.0, 0 = off).")
+    p.add_argument("--idle-after", type=float, default=None,
+                   help="Detik tanpa gerak sebelum dianggap idle (default 5).")
+    p.add_argument("--idle-fps", type=float, default=None,
+                   help="FPS polling kamera saat idle (default 0 = tidak throttle).")
+
+    # Camera supervisor
+    p.add_argument("--stall-timeout", type=float, default=None,
+                   help="Detik tanpa frame kamera sebelum reconnect (default 2).")
+    p.add_argument("--reconnect-max-backoff", type=float, default=None,
+                   help="Batas backoff reconnect kamera dalam detik (default 8).")
+
+    # Diagnostics
+    p.add_argument("--startup-profile", action="store_true",
+                   help="Cetak breakdown waktu import/startup sampai frame pertama terkirim.")
+    p.add_argument("--trace", type=str, default=None, metavar="FILE",
+                   help="Rekam span per stage/thread (Chrome trace JSON) ke ring buffer; "
+                        "dump ke FILE via SIGUSR1, /trace/dump, atau saat keluar.")
+    p.add_argument("--trace-seconds", type=float, default=30.0,
+                   help="Panjang ring buffer trace dalam detik (default 30).")
+    p.add_argument("--trace-sample-ms", type=int, default=0,
+                   help="Sampling stack Python tiap N ms ke trace (default 0 = off).")
+    p.add_argument("--mem-monitor", type=float, default=None, metavar="SECONDS",
+                   help="Sampling RSS (+ tracemalloc kalau --tracemalloc) tiap SECONDS; lihat /debug/memory.")
+    p.add_argument("--tracemalloc", action="store_true",
+                   help="Aktifkan tracemalloc: site alokasi yang tumbuh & alokasi NumPy besar per frame.")
+    p.add_argument("--soak", type=float, default=None, metavar="SECONDS",
+                   help="Soak test: putar ulang frame lewat pipeline tanpa kamera/loopback selama SECONDS, "
+                        "exit 1 kalau RSS terus naik.")
+    p.add_argument("--soak-source", type=str, default=None, metavar="VIDEO",
+                   help="File video untuk --soak (default frame sintetis).")
+    p.add_argument("--soak-max-growth", type=float, default=20.0,
+                   help="Batas kenaikan RSS setelah warm-up untuk --soak, MB/jam (default 20).")
+    p.add_argument("--latency-probe", action="store_true",
+                   help="Stempel pola frame-counter/timestamp di pojok output dan ukur latency "
+                        "dengan membaca balik device loopback (hasil di log & /metrics).")
+    p.add_argument("--latency-read", type=str, default=None, metavar="DEVICE",
+                   help="Mode report: baca DEVICE sebagai consumer, decode pola probe, cetak latency & frame loss.")
+    p.add_argument("--latency-duration", type=float, default=10.0,
+                   help="Durasi --latency-read dalam detik (default 10).")
 
 
     args = p.parse_args()
+    STARTUP.enabled = args.startup_profile
+    TRACER.configure(seconds=args.trace_seconds, sample_ms=args.trace_sample_ms)
+    if args.trace:
+        TRACER.configure(enabled=True, path=args.trace)
+        # exit normal / sys.exit (soak, stream berhenti sendiri); SIGINT/SIGTERM lewat _stop
+        atexit.register(dump_trace_on_exit)
 
     # 0) Load config terakhir (kecuali diminta tidak)
     if not args.no_load_last:
@@ -853,6 +3189,47 @@ def main():
         if last:
             print(f"[INFO] loaded last config from {CONFIG_FILE}")
             apply_config_to_runtime(last)
+    if args.rollback is not None:
+        data = CONFIG_STORE.load_version(args.rollback)
+        if data is None:
+            print(f"[ERROR] config v{args.rollback} tidak ada di {CONFIG_HISTORY_DIR}", file=sys.stderr)
+            sys.exit(1)
+        print(f"[INFO] rollback ke config v{args.rollback}")
+        apply_config_to_runtime(data)
+
+    # Latency report (consumer saja, stream jalan di proses lain)
+    if args.latency_read:
+        load_deps(cam=False)
+        reader = LatencyProbeReader(args.latency_read)
+        print(f"[INFO] membaca {args.latency_read} selama {args.latency_duration:.0f} detik...")
+        try:
+            reader.run(duration=args.latency_duration)
+        except RuntimeError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(1)
+        reader.report()
+        return
+
+    # Preset management (tanpa streaming)
+    if args.list_presets:
+        for name in list_presets():
+            print(("* " if name == CFG.preset else "  ") + name)
+        return
+    if args.delete_preset:
+        if not delete_preset(args.delete_preset):
+            print(f"[ERROR] preset tidak ditemukan: {args.delete_preset}", file=sys.stderr)
+            sys.exit(1)
+        return
+    if args.preset:
+        try:
+            look = activate_preset(args.preset)
+        except ValueError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(1)
+        if look is None:
+            print(f"[ERROR] preset tidak ditemukan: {args.preset}", file=sys.stderr)
+            sys.exit(1)
+        print(f"[INFO] preset aktif: {args.preset}")
 
     # Init CFG from args
     # CFG.in_index = args.in_index
@@ -885,6 +3262,46 @@ def main():
     if args.duotone is not None:    CFG.duo1, CFG.duo2 = args.duotone
     if args.bg is not None:         CFG.bg = args.bg
     if args.mirror:                 CFG.mirror = True
+    if args.font is not None:       CFG.font = args.font
+    if args.font_scale is not None: CFG.font_scale = args.font_scale
+    if args.glyph_mode is not None: CFG.glyph_mode = args.glyph_mode
+    if args.shape_grid is not None: CFG.shape_grid = args.shape_grid
+    if args.color_mode is not None: CFG.color_mode = args.color_mode
+    if args.palette is not None:    CFG.palette = list(parse_palette(args.palette))
+    if args.out_format is not None: CFG.out_format = args.out_format
+    if args.roi_mode is not None:   CFG.roi_mode = args.roi_mode
+    if args.roi_mode == "face":
+        load_deps(cam=False)
+        if face_cascade_path() is None:
+            print("[ERROR] --roi-mode face butuh Haar cascade OpenCV (CascadeClassifier); "
+                  "pasang opencv-python<5 atau pakai --roi-mode fixed", file=sys.stderr)
+            sys.exit(1)
+    if args.roi is not None:        CFG.roi = list(parse_roi(args.roi))
+    if args.roi_factor is not None: CFG.roi_factor = max(2, args.roi_factor)
+    if args.face_every is not None: CFG.face_every = max(1, args.face_every)
+    if args.motion_threshold is not None: CFG.motion_threshold = args.motion_threshold
+    if args.idle_after is not None: CFG.idle_after = args.idle_after
+    if args.idle_fps is not None:   CFG.idle_fps = args.idle_fps
+    if args.latency_probe:          CFG.latency_probe = True
+    if args.stall_timeout is not None: CFG.stall_timeout = args.stall_timeout
+    if args.reconnect_max_backoff is not None: CFG.backoff_max = args.reconnect_max_backoff
+
+    if args.save_preset:
+        try:
+            save_preset(args.save_preset)
+        except ValueError as e:
+            print(f"[ERROR] {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if args.soak is not None:
+        ok = run_soak(args.soak, source=args.soak_source, max_growth=args.soak_max_growth,
+                      use_tracemalloc=args.tracemalloc)
+        sys.exit(0 if ok else 1)
+    if args.mem_monitor is not None or args.tracemalloc:
+        load_deps(cam=False)
+        MEMORY.interval = max(1.0, args.mem_monitor or MEMORY.interval)
+        MEMORY.start(use_tracemalloc=args.tracemalloc)
 
     # CLI menu (non-UI)
     if args.menu and not args.ui:
@@ -898,8 +3315,12 @@ def main():
         # sync video_nr from out_device
         try: CFG.video_nr = int(CFG.out_device.replace("/dev/video",""))
         except: pass
+        # import modul berat di background selagi modprobe (bisa nunggu sudo)
+        threading.Thread(target=load_deps, daemon=True).start()
         if not args.skip_loopback:
-            if not ensure_loopback(video_nr=CFG.video_nr, label=args.label, exclusive_caps=args.exclusive_caps, verbose=True):
+            with STARTUP.span("ensure loopback (main)"):
+                ok_loop = ensure_loopback(video_nr=CFG.video_nr, label=args.label, exclusive_caps=args.exclusive_caps, verbose=True)
+            if not ok_loop:
                 sys.exit(1)
 
         save_current_config()
@@ -909,17 +3330,20 @@ def main():
             stream_loop()
         finally:
             RUN_EVENT.clear()
+            CONFIG_STORE.flush()
         return
 
     # UI mode
     if args.ui:
-        if not FLASK_OK:
+        if not load_flask():
             print("[ERROR] Flask belum terpasang. pip install Flask", file=sys.stderr)
             sys.exit(1)
         app = make_app()
         print("[INFO] Web UI: http://127.0.0.1:8765")
         # mulai stream awal juga (pakai current CFG)
         restart_stream()
+        # atlas/LUT preset lain disiapkan di background biar switch instan
+        threading.Thread(target=warm_presets, daemon=True).start()
         app.run(host="127.0.0.1", port=8765, debug=False, threaded=True)
     
 
@@ -929,7 +3353,13 @@ def main():
 if __name__ == "__main__":
     def _stop(_s,_f):
         RUN_EVENT.clear()
+        CONFIG_STORE.flush()
+        dump_trace_on_exit()
         os._exit(0)
+    def _dump_trace(_s,_f):
+        threading.Thread(target=TRACER.dump, daemon=True).start()
     signal.signal(signal.SIGINT, _stop)
     signal.signal(signal.SIGTERM, _stop)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, _dump_trace)
     main()